@@ -2,12 +2,13 @@
 Accounts API Blueprint
 Handles CRUD operations for bank accounts.
 """
-from flask import Blueprint, request, current_app
+from flask import Blueprint, current_app
 from pymongo.errors import DuplicateKeyError, PyMongoError
 
 from models.account import Account
 from utils.db import mongo
 from utils.responses import error_response, success_response
+from utils.validators import get_json_body
 
 accounts_bp = Blueprint('accounts', __name__)
 
@@ -69,7 +70,7 @@ def create_account() -> tuple:
         JSON response with the created account
     """
     try:
-        data = request.get_json()
+        data = get_json_body()
         if not data or not data.get('name') or not data.get('type'):
             return error_response('INVALID_REQUEST', 'name and type are required')
         next_id = Account.get_next_id(mongo)
@@ -106,7 +107,7 @@ def update_account(account_id: int) -> tuple:
         JSON response with an updated account
     """
     try:
-        data = request.get_json()
+        data = get_json_body()
         if not data:
             return error_response('INVALID_REQUEST', 'Request body must be JSON')
         account = mongo.db.accounts.find_one({'id': account_id})
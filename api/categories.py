@@ -2,16 +2,29 @@
 Categories API Blueprint
 Handles CRUD operations for budget categories.
 """
-from flask import Blueprint, request, current_app
-from pymongo.errors import PyMongoError
+from flask import Blueprint, current_app
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
 
 from models.category import Category
+from utils.cache import category_cache
 from utils.db import mongo
 from utils.responses import error_response, success_response
-from utils.validators import validate_json_request
+from utils.validators import get_json_body, validate_json_request
 
 categories_bp = Blueprint('categories', __name__)
 
+# Fields returned by the category endpoints (audit timestamps are not exposed)
+CATEGORY_PROJECTION = {
+    '_id': 1,
+    'id': 1,
+    'name': 1,
+    'description': 1,
+    'color': 1,
+    'monthly_limit': 1,
+    'is_system': 1,
+}
+
 
 @categories_bp.route('/categories', methods=['GET'])
 def list_categories() -> tuple:
@@ -22,9 +35,12 @@ def list_categories() -> tuple:
         JSON response with all categories
     """
     try:
-        categories = list(mongo.db.categories.find())
-        categories_json = [Category.to_json(cat) for cat in categories]
-        return success_response(data=categories_json, count=len(categories_json))
+        categories = category_cache.get('all')
+        if categories is None:
+            # fast_json encodes ObjectId/datetime, so documents need no per-row conversion
+            categories = list(mongo.db.categories.find({}, CATEGORY_PROJECTION))
+            category_cache.set('all', categories)
+        return success_response(data=categories, count=len(categories))
 
     except PyMongoError as e:
         current_app.logger.error('Database error listing categories: %s', e)
@@ -43,7 +59,7 @@ def get_category(category_id: int) -> tuple:
         JSON response with category data
     """
     try:
-        category = mongo.db.categories.find_one({'id': category_id})
+        category = mongo.db.categories.find_one({'id': category_id}, CATEGORY_PROJECTION)
 
         if not category:
             return error_response('NOT_FOUND', f'Category not found: {category_id}', 404)
@@ -76,14 +92,7 @@ def create_category() -> tuple:
         if error:
             return error
 
-        existing = mongo.db.categories.find_one({'name': data['name'].strip()})
-        if existing:
-            return error_response(
-                'DUPLICATE_NAME',
-                f'Category with name "{data["name"]}" already exists',
-                409,
-            )
-
+        # Duplicate names are rejected by the unique index on insert
         next_id = Category.get_next_id(mongo)
 
         try:
@@ -99,6 +108,7 @@ def create_category() -> tuple:
 
         result = mongo.db.categories.insert_one(category)
         category['_id'] = result.inserted_id
+        category_cache.clear()
 
         current_app.logger.info('Created category: %s with ID %s', data['name'], next_id)
 
@@ -110,6 +120,12 @@ def create_category() -> tuple:
 
     except ValueError as e:
         return error_response('VALIDATION_ERROR', str(e))
+    except DuplicateKeyError:
+        return error_response(
+            'DUPLICATE_NAME',
+            f'Category with name "{data["name"]}" already exists',
+            409,
+        )
     except PyMongoError as e:
         current_app.logger.error('Database error creating category: %s', e)
         return error_response('DATABASE_ERROR', 'Failed to create category', 500)
@@ -137,15 +153,11 @@ def update_category(category_id: int) -> tuple:
         JSON response with updated category
     """
     try:
-        data = request.get_json()
+        data = get_json_body()
 
         if not data:
             return error_response('INVALID_REQUEST', 'Request body must be JSON')
 
-        category = mongo.db.categories.find_one({'id': category_id})
-        if not category:
-            return error_response('NOT_FOUND', f'Category not found: {category_id}', 404)
-
         try:
             update_doc = Category.update(category_id, **data)
         except ValueError as e:
@@ -154,9 +166,16 @@ def update_category(category_id: int) -> tuple:
         if not update_doc or '$set' not in update_doc or not update_doc['$set']:
             return error_response('NO_UPDATES', 'No valid fields to update')
 
-        mongo.db.categories.update_one({'id': category_id}, update_doc)
-
-        updated_category = mongo.db.categories.find_one({'id': category_id})
+        # Existence check, update and re-fetch in a single round-trip
+        updated_category = mongo.db.categories.find_one_and_update(
+            {'id': category_id},
+            update_doc,
+            projection=CATEGORY_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+        if not updated_category:
+            return error_response('NOT_FOUND', f'Category not found: {category_id}', 404)
+        category_cache.clear()
 
         current_app.logger.info(
             'Updated category ID %s: %s', category_id, updated_category['name']
@@ -167,6 +186,12 @@ def update_category(category_id: int) -> tuple:
             message=f'Category "{updated_category["name"]}" updated successfully',
         )
 
+    except DuplicateKeyError:
+        return error_response(
+            'DUPLICATE_NAME',
+            f'Category with name "{data["name"]}" already exists',
+            409,
+        )
     except PyMongoError as e:
         current_app.logger.error('Database error updating category %s: %s', category_id, e)
         return error_response('DATABASE_ERROR', 'Failed to update category', 500)
@@ -184,6 +209,19 @@ def delete_category(category_id: int) -> tuple:
         JSON response confirming deletion
     """
     try:
+        # Happy path: an unused, non-system category is removed in two round-trips.
+        # The usage probe stops at the first matching transaction.
+        if not mongo.db.transactions.count_documents({'category_id': category_id}, limit=1):
+            if deleted := mongo.db.categories.find_one_and_delete(
+                {'id': category_id, 'is_system': {'$ne': True}}
+            ):
+                category_cache.clear()
+                current_app.logger.info('Deleted category ID %s: %s', category_id, deleted['name'])
+                return success_response(
+                    message=f'Category "{deleted["name"]}" deleted successfully'
+                )
+
+        # Nothing was deleted - fetch the category to report why
         category = mongo.db.categories.find_one({'id': category_id})
         if not category:
             return error_response('NOT_FOUND', f'Category not found: {category_id}', 404)
@@ -196,21 +234,14 @@ def delete_category(category_id: int) -> tuple:
             )
 
         transaction_count = mongo.db.transactions.count_documents({'category_id': category_id})
-        if transaction_count > 0:
-            return error_response(
-                'CATEGORY_IN_USE',
-                (
-                    f'Cannot delete category "{category["name"]}" (ID {category_id}) - '
-                    f'it is used by {transaction_count} transaction(s)'
-                ),
-                409,
-            )
-
-        mongo.db.categories.delete_one({'id': category_id})
-
-        current_app.logger.info('Deleted category ID %s: %s', category_id, category['name'])
-
-        return success_response(message=f'Category "{category["name"]}" deleted successfully')
+        return error_response(
+            'CATEGORY_IN_USE',
+            (
+                f'Cannot delete category "{category["name"]}" (ID {category_id}) - '
+                f'it is used by {transaction_count} transaction(s)'
+            ),
+            409,
+        )
 
     except PyMongoError as e:
         current_app.logger.error('Database error deleting category %s: %s', category_id, e)
@@ -5,22 +5,65 @@ Handles CRUD operations for budget transactions.
 from datetime import datetime
 
 from flask import Blueprint, request, current_app
-from bson import ObjectId
-from bson.errors import InvalidId
+from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
 
 from models.transaction import Transaction
-from utils.db import mongo
-from utils.responses import error_response, success_response
+from utils.aggregations import Aggregations
+from utils.db import count_matching, find_page, mongo, page_stages
+from utils.responses import error_response, stream_list_response, success_response
+from utils.tasks import submit_task
 from utils.validators import (
+    get_json_body,
     validate_json_request,
     validate_category_id,
     build_transaction_update_doc,
     validate_update_request,
+    parse_object_id,
 )
 
 transactions_bp = Blueprint('transactions', __name__)
 
+# batch_categorized value reported when batch categorization runs in the background
+BATCH_QUEUED = -1
+
+# Joins category name/color onto each transaction (?include=category)
+CATEGORY_LOOKUP_STAGES = [
+    {
+        '$lookup': {
+            'from': 'categories',
+            'localField': 'category_id',
+            'foreignField': 'id',
+            'as': 'category',
+            'pipeline': [{'$project': {'_id': 0, 'name': 1, 'color': 1}}],
+        }
+    },
+    {'$unwind': {'path': '$category', 'preserveNullAndEmptyArrays': True}},
+]
+
+# Listings with no limit or a limit above this are streamed from a cursor
+STREAM_THRESHOLD = 500
+STREAM_BATCH_SIZE = 200
+
+# Upper bound on IDs accepted by a single bulk delete request
+MAX_BULK_DELETE_IDS = 1000
+
+# Fields returned by the transaction endpoints: every stored field except
+# internal lookup fields such as description_upper
+TRANSACTION_PROJECTION = {
+    '_id': 1,
+    'date': 1,
+    'description': 1,
+    'amount': 1,
+    'category_id': 1,
+    'account_id': 1,
+    'source_file': 1,
+    'notes': 1,
+    'auto_categorized': 1,
+    'confidence': 1,
+    'upload_date': 1,
+}
+
 
 def parse_date(date_string: str) -> datetime:
     """
@@ -35,10 +78,14 @@ def parse_date(date_string: str) -> datetime:
     Raises:
         ValueError: If a date format is invalid
     """
-    try:
-        return datetime.strptime(date_string, '%Y-%m-%d')
-    except ValueError as exc:
-        raise ValueError(f'Invalid date format: {date_string}. Expected YYYY-MM-DD') from exc
+    # fromisoformat is much cheaper than strptime but also accepts other ISO
+    # forms (week dates, times), so pin the exact YYYY-MM-DD shape first
+    if len(date_string) == 10 and date_string[4] == date_string[7] == '-':
+        try:
+            return datetime.fromisoformat(date_string)
+        except ValueError:
+            pass
+    raise ValueError(f'Invalid date format: {date_string}. Expected YYYY-MM-DD')
 
 
 @transactions_bp.route('/transactions', methods=['GET'])
@@ -54,6 +101,7 @@ def list_transactions() -> tuple:
         offset: Number of results to skip (default: 0)
         sort: Sort field (default: date)
         order: Sort order - 'asc' or 'desc' (default: desc)
+        include: 'category' to embed each transaction's category name and color
 
     Returns:
         JSON response with transactions
@@ -93,6 +141,9 @@ def list_transactions() -> tuple:
         except ValueError:
             return error_response('INVALID_PAGINATION', 'limit and offset must be integers')
 
+        if limit < 0 or offset < 0:
+            return error_response('INVALID_PAGINATION', 'limit and offset cannot be negative')
+
         sort_field = request.args.get('sort', 'date')
         sort_order = request.args.get('order', 'desc')
 
@@ -101,20 +152,46 @@ def list_transactions() -> tuple:
 
         sort_direction = -1 if sort_order == 'desc' else 1
 
-        transactions = list(
-            mongo.db.transactions
-            .find(query)
-            .sort(sort_field, sort_direction)
-            .skip(offset)
-            .limit(limit)
-        )
-
-        total_count = mongo.db.transactions.count_documents(query)
-        transactions_json = [Transaction.to_json(txn) for txn in transactions]
+        extra_stages = None
+        if 'category' in request.args.get('include', '').split(','):
+            extra_stages = CATEGORY_LOOKUP_STAGES
+
+        if not limit or limit > STREAM_THRESHOLD:
+            # Large pages: stream documents as batches arrive instead of
+            # building the whole page in one $facet result document
+            cursor = mongo.db.transactions.aggregate(
+                [
+                    {'$match': query},
+                    *page_stages(
+                        {sort_field: sort_direction},
+                        offset,
+                        limit,
+                        TRANSACTION_PROJECTION,
+                        extra_stages,
+                    ),
+                ],
+                batchSize=STREAM_BATCH_SIZE,
+            )
+            return stream_list_response(
+                cursor,
+                total=count_matching(mongo.db.transactions, query),
+                limit=limit,
+                offset=offset,
+            )
 
+        transactions, total_count = find_page(
+            mongo.db.transactions,
+            query,
+            {sort_field: sort_direction},
+            offset=offset,
+            limit=limit,
+            projection=TRANSACTION_PROJECTION,
+            extra_stages=extra_stages,
+        )
+        # fast_json encodes ObjectId/datetime, so documents need no per-row conversion
         return success_response(
-            data=transactions_json,
-            count=len(transactions_json),
+            data=transactions,
+            count=len(transactions),
             total=total_count,
             limit=limit,
             offset=offset,
@@ -139,15 +216,14 @@ def get_transaction(transaction_id: str) -> tuple:
         JSON response with transaction data
     """
     try:
-        try:
-            object_id = ObjectId(transaction_id)
-        except InvalidId:
+        object_id = parse_object_id(transaction_id)
+        if object_id is None:
             return error_response(
                 'INVALID_ID',
                 f'Invalid transaction ID format: {transaction_id}',
             )
 
-        transaction = mongo.db.transactions.find_one({'_id': object_id})
+        transaction = mongo.db.transactions.find_one({'_id': object_id}, TRANSACTION_PROJECTION)
 
         if not transaction:
             return error_response('NOT_FOUND', f'Transaction not found: {transaction_id}', 404)
@@ -203,6 +279,7 @@ def create_transaction() -> tuple:
 
         result = mongo.db.transactions.insert_one(transaction)
         transaction['_id'] = result.inserted_id
+        Aggregations.invalidate_monthly_summaries(mongo, [transaction['date']])
 
         current_app.logger.info('Created transaction: %s', data['description'])
 
@@ -219,6 +296,28 @@ def create_transaction() -> tuple:
         return error_response('DATABASE_ERROR', 'Failed to create transaction', 500)
 
 
+def _batch_categorize(categorizer, description: str, category_id: int) -> int:
+    """
+    Apply a category to uncategorized transactions similar to a description.
+
+    Args:
+        categorizer: An AutoCategorizer instance
+        description: Description of the transaction that was categorized
+        category_id: Category ID to assign
+
+    Returns:
+        int: Number of transactions updated
+    """
+    batch_count = categorizer.batch_categorize_similar(description, category_id)
+    if batch_count > 0:
+        current_app.logger.info(
+            'Batch categorized %s similar transactions to category %s',
+            batch_count,
+            category_id,
+        )
+    return batch_count
+
+
 @transactions_bp.route('/transactions/<transaction_id>', methods=['PUT'])
 def update_transaction(transaction_id: str) -> tuple:
     """
@@ -237,14 +336,11 @@ def update_transaction(transaction_id: str) -> tuple:
         }
 
     Returns:
-        JSON response with updated transaction
+        JSON response with updated transaction. batch_categorized is -1 when
+        similar transactions are being categorized in the background.
     """
     try:
-        object_id, data, error = validate_update_request(
-            transaction_id,
-            mongo.db.transactions,
-            'transaction',
-        )
+        object_id, data, error = validate_update_request(transaction_id, 'transaction')
         if error:
             return error
 
@@ -262,9 +358,21 @@ def update_transaction(transaction_id: str) -> tuple:
         if not update_doc:
             return error_response('NO_UPDATES', 'No valid fields to update')
 
-        mongo.db.transactions.update_one({'_id': object_id}, {'$set': update_doc})
+        # Existence check and update in a single round-trip. The pre-image is
+        # returned so the month it moved out of can be invalidated too.
+        original = mongo.db.transactions.find_one_and_update(
+            {'_id': object_id},
+            {'$set': update_doc},
+            projection=TRANSACTION_PROJECTION,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if not original:
+            return error_response('NOT_FOUND', f'Transaction not found: {transaction_id}', 404)
 
-        updated_transaction = mongo.db.transactions.find_one({'_id': object_id})
+        updated_transaction = {**original, **update_doc}
+        Aggregations.invalidate_monthly_summaries(
+            mongo, [original['date'], updated_transaction['date']]
+        )
 
         batch_count = 0
         if 'category_id' in update_doc and update_doc['category_id'] != 0:
@@ -277,22 +385,27 @@ def update_transaction(transaction_id: str) -> tuple:
             )
 
             if data.get('batch_categorize', True):
-                batch_count = categorizer.batch_categorize_similar(
-                    updated_transaction['description'],
-                    update_doc['category_id'],
-                )
-
-                if batch_count > 0:
-                    current_app.logger.info(
-                        'Batch categorized %s similar transactions to category %s',
-                        batch_count,
+                if current_app.config['BACKGROUND_TASKS']:
+                    submit_task(
+                        _batch_categorize,
+                        categorizer,
+                        updated_transaction['description'],
+                        update_doc['category_id'],
+                    )
+                    batch_count = BATCH_QUEUED
+                else:
+                    batch_count = _batch_categorize(
+                        categorizer,
+                        updated_transaction['description'],
                         update_doc['category_id'],
                     )
 
         current_app.logger.info('Updated transaction: %s', transaction_id)
 
         message = 'Transaction updated successfully'
-        if batch_count > 0:
+        if batch_count == BATCH_QUEUED:
+            message += ' (similar transactions are being categorized)'
+        elif batch_count > 0:
             message += f' ({batch_count} similar transaction(s) also categorized)'
 
         return success_response(
@@ -318,23 +431,25 @@ def delete_transaction(transaction_id: str) -> tuple:
         JSON response confirming deletion
     """
     try:
-        try:
-            object_id = ObjectId(transaction_id)
-        except InvalidId:
+        object_id = parse_object_id(transaction_id)
+        if object_id is None:
             return error_response(
                 'INVALID_ID',
                 f'Invalid transaction ID format: {transaction_id}',
             )
 
-        transaction = mongo.db.transactions.find_one({'_id': object_id})
-        if not transaction:
+        deleted = mongo.db.transactions.find_one_and_delete(
+            {'_id': object_id},
+            projection={'date': 1},
+        )
+        if not deleted:
             return error_response(
                 'NOT_FOUND',
                 f'Transaction not found: {transaction_id}',
                 404,
             )
 
-        mongo.db.transactions.delete_one({'_id': object_id})
+        Aggregations.invalidate_monthly_summaries(mongo, [deleted.get('date')])
 
         current_app.logger.info('Deleted transaction: %s', transaction_id)
 
@@ -359,7 +474,7 @@ def bulk_delete_transactions() -> tuple:
         JSON response with deletion count
     """
     try:
-        data = request.get_json()
+        data = get_json_body()
 
         if not data or 'ids' not in data:
             return error_response('INVALID_REQUEST', 'Request body must contain "ids" array')
@@ -367,14 +482,23 @@ def bulk_delete_transactions() -> tuple:
         if not isinstance(data['ids'], list):
             return error_response('INVALID_REQUEST', '"ids" must be an array')
 
-        object_ids = []
+        if len(data['ids']) > MAX_BULK_DELETE_IDS:
+            return error_response(
+                'TOO_MANY_IDS',
+                f'Cannot delete more than {MAX_BULK_DELETE_IDS} transactions per request',
+            )
+
+        # Reject malformed IDs before doing any work, then dedupe
+        object_ids = set()
         for tid in data['ids']:
-            try:
-                object_ids.append(ObjectId(tid))
-            except InvalidId:
+            object_id = parse_object_id(tid)
+            if object_id is None:
                 return error_response('INVALID_ID', f'Invalid transaction ID format: {tid}')
+            object_ids.add(object_id)
 
-        result = mongo.db.transactions.delete_many({'_id': {'$in': object_ids}})
+        result = mongo.db.transactions.delete_many({'_id': {'$in': list(object_ids)}})
+        if result.deleted_count:
+            Aggregations.invalidate_monthly_summaries(mongo)
 
         current_app.logger.info('Bulk deleted %s transactions', result.deleted_count)
 
@@ -3,23 +3,62 @@ Upload API Blueprint
 Handles CSV file uploads and transaction import.
 """
 
-from datetime import datetime, UTC
+from datetime import datetime
 from flask import Blueprint, request, current_app
 from werkzeug.utils import secure_filename
 from pymongo.errors import PyMongoError
 
-from utils.csv_parser import CSVParser, allowed_file
-from utils.categorization import AutoCategorizer
+from utils.csv_parser import CSVParser, allowed_file, open_upload
+from utils.categorization import get_categorizer
 from utils.db import mongo
 from utils.responses import error_response, success_response
 from utils.transaction_importer import process_transactions
+from utils.validators import parse_object_id
 
 upload_bp = Blueprint('upload', __name__)
 
+# Fields returned by list_uploads; the errors array is reduced to its length server-side
+UPLOAD_LIST_PROJECTION = {
+    'filename': 1,
+    'upload_date': 1,
+    'row_count': 1,
+    'month': 1,
+    'status': 1,
+    'categorized_count': 1,
+    'uncategorized_count': 1,
+    'error_count': {'$size': {'$ifNull': ['$errors', []]}},
+}
+# Uploads are listed newest first; _id breaks ties between equal timestamps
+UPLOAD_LIST_SORT = [('upload_date', -1), ('_id', -1)]
+
+
+def _parse_before_cursor(before: str) -> dict | None:
+    """
+    Build the filter for uploads listed after a before cursor.
+
+    Args:
+        before: Cursor from a previous page's next_before ('<ISO timestamp>_<upload id>')
+
+    Returns:
+        dict: Filter matching uploads that sort after the cursor, or None if malformed
+    """
+    timestamp, _, upload_id = before.rpartition('_')
+    object_id = parse_object_id(upload_id)
+    try:
+        upload_date = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if object_id is None:
+        return None
+    return {'$or': [
+        {'upload_date': {'$lt': upload_date}},
+        {'upload_date': upload_date, '_id': {'$lt': object_id}},
+    ]}
+
 
 def _validate_uploaded_file() -> tuple:
     """
-    Validate uploaded file and return file content and filename.
+    Validate uploaded file and return a text stream over it and its filename.
 
     Returns:
         tuple: (file_content, filename, error_response) where error is None if valid
@@ -35,7 +74,7 @@ def _validate_uploaded_file() -> tuple:
     if not allowed_file(file.filename):
         return None, None, error_response('INVALID_FILE_TYPE', 'Only CSV files are allowed')
 
-    file_content = file.read().decode('utf-8')
+    file_content = open_upload(file)
     filename = secure_filename(file.filename)
 
     validation = CSVParser.validate_csv(file_content)
@@ -61,53 +100,39 @@ def upload_csv() -> tuple:
         if error:
             return error
 
+        # Rows are parsed and saved batch by batch; a parse error part-way
+        # through discards the rows already saved
         try:
-            parse_result = CSVParser.parse_csv(file_content, filename)
+            upload = process_transactions(
+                CSVParser.parse_csv_iter(file_content, current_app.config['UPLOAD_BATCH_SIZE']),
+                filename,
+                get_categorizer(mongo),
+            )
         except (ValueError, UnicodeDecodeError, KeyError) as e:
             current_app.logger.error('CSV parsing error: %s', e)
             return error_response('PARSE_ERROR', f'Error parsing CSV: {str(e)}')
 
-        if parse_result['row_count'] == 0:
+        if upload is None:
             return error_response('NO_DATA', 'No valid transactions found in CSV')
 
-        categorizer = AutoCategorizer(mongo)
-        row_count, categorized_count, uncategorized_count = process_transactions(
-            parse_result, filename, categorizer
-        )
-
-        month = (parse_result['transactions'][0]['date'].strftime('%Y-%m')
-                 if parse_result['transactions']
-                 else datetime.now(UTC).strftime('%Y-%m'))
-
-        mongo.db.uploads.insert_one({
-            'filename': filename,
-            'upload_date': datetime.now(UTC),
-            'row_count': row_count,
-            'month': month,
-            'status': 'processed',
-            'categorized_count': categorized_count,
-            'uncategorized_count': uncategorized_count,
-            'errors': parse_result['errors'],
-        })
-
         current_app.logger.info(
             'Uploaded %s: %s transactions, %s auto-categorized, %s uncategorized',
             filename,
-            row_count,
-            categorized_count,
-            uncategorized_count,
+            upload['row_count'],
+            upload['categorized_count'],
+            upload['uncategorized_count'],
         )
 
         return success_response(
             data={
                 'filename': filename,
-                'total_rows': row_count,
-                'categorized': categorized_count,
-                'uncategorized': uncategorized_count,
-                'month': month,
-                'errors': parse_result['errors'],
+                'total_rows': upload['row_count'],
+                'categorized': upload['categorized_count'],
+                'uncategorized': upload['uncategorized_count'],
+                'month': upload['month'],
+                'errors': upload['errors'],
             },
-            message=f'Successfully imported {row_count} transactions',
+            message=f'Successfully imported {upload["row_count"]} transactions',
             status_code=201,
         )
 
@@ -142,8 +167,7 @@ def validate_csv() -> tuple:
         if not allowed_file(file.filename):
             return error_response('INVALID_FILE_TYPE', 'Only CSV files are allowed')
 
-        file_content = file.read().decode('utf-8')
-        validation = CSVParser.validate_csv(file_content)
+        validation = CSVParser.validate_csv(open_upload(file))
 
         if validation['valid']:
             return success_response(
@@ -168,6 +192,8 @@ def list_uploads() -> tuple:
     Query parameters:
         limit: Maximum number of results (default: 50)
         offset: Number of results to skip (default: 0)
+        before: Cursor from the previous page's next_before; only uploads
+            listed after it are returned. Cannot be combined with offset.
 
     Returns:
         JSON response with upload history
@@ -179,40 +205,45 @@ def list_uploads() -> tuple:
         except ValueError:
             return error_response('INVALID_PAGINATION', 'limit and offset must be integers')
 
-        uploads = list(
+        query = {}
+        if before := request.args.get('before'):
+            if offset:
+                return error_response(
+                    'INVALID_PAGINATION', 'offset cannot be combined with before'
+                )
+            query = _parse_before_cursor(before)
+            if query is None:
+                return error_response('INVALID_PAGINATION', f'Invalid before cursor: {before}')
+
+        cursor = (
             mongo.db.uploads
-            .find()
-            .sort('upload_date', -1)
-            .skip(offset)
+            .find(query, UPLOAD_LIST_PROJECTION)
+            .sort(UPLOAD_LIST_SORT)
             .limit(limit)
         )
+        if offset:
+            cursor = cursor.skip(offset)
+        uploads = list(cursor)
 
-        uploads_json = []
+        # fast_json encodes ObjectId/datetime, so documents need no per-row conversion
         for upload in uploads:
-            upload_dict = {
-                '_id': str(upload['_id']),
-                'filename': upload['filename'],
-                'upload_date': upload['upload_date'].isoformat(),
-                'row_count': upload['row_count'],
-                'month': upload['month'],
-                'status': upload['status'],
-                'categorized_count': upload['categorized_count'],
-                'uncategorized_count': upload['uncategorized_count'],
-            }
+            if not upload['error_count']:
+                del upload['error_count']
 
-            if 'errors' in upload and upload['errors']:
-                upload_dict['error_count'] = len(upload['errors'])
-
-            uploads_json.append(upload_dict)
-
-        total_count = mongo.db.uploads.count_documents({})
+        # Total upload count (ignoring the before cursor) comes from collection metadata
+        total_count = mongo.db.uploads.estimated_document_count()
 
         return success_response(
-            data=uploads_json,
-            count=len(uploads_json),
+            data=uploads,
+            count=len(uploads),
             total=total_count,
             limit=limit,
             offset=offset,
+            next_before=(
+                f"{uploads[-1]['upload_date'].isoformat()}_{uploads[-1]['_id']}"
+                if limit and len(uploads) == limit
+                else None
+            ),
         )
 
     except PyMongoError as e:
@@ -232,12 +263,8 @@ def get_upload_details(upload_id: str) -> tuple:
         JSON response with upload details including errors
     """
     try:
-        from bson import ObjectId
-        from bson.errors import InvalidId
-
-        try:
-            object_id = ObjectId(upload_id)
-        except InvalidId:
+        object_id = parse_object_id(upload_id)
+        if object_id is None:
             return error_response('INVALID_ID', f'Invalid upload ID format: {upload_id}')
 
         upload = mongo.db.uploads.find_one({'_id': object_id})
@@ -246,9 +273,9 @@ def get_upload_details(upload_id: str) -> tuple:
             return error_response('NOT_FOUND', f'Upload not found: {upload_id}', 404)
 
         upload_json = {
-            '_id': str(upload['_id']),
+            '_id': upload['_id'],
             'filename': upload['filename'],
-            'upload_date': upload['upload_date'].isoformat(),
+            'upload_date': upload['upload_date'],
             'row_count': upload['row_count'],
             'month': upload['month'],
             'status': upload['status'],
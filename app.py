@@ -11,9 +11,11 @@ from pymongo.errors import PyMongoError
 from config import config
 from utils.db_init import init_db
 from utils.db import mongo
+from utils.responses import OrjsonProvider
+from utils.tasks import init_executor
 
 
-def create_app(config_name: str = None) -> Flask:
+def create_app(config_name: str = None, config_overrides: dict | None = None) -> Flask:
     """
     Application factory pattern.
     Creates and configures the Flask application.
@@ -21,22 +23,28 @@ def create_app(config_name: str = None) -> Flask:
     Args:
         config_name: Configuration to use (development, testing, production)
                      Defaults to FLASK_ENV environment variable or 'development'
+        config_overrides: Settings applied on top of the configuration before
+                          extensions are initialized (e.g. a per-worker MONGO_URI)
 
     Returns:
         Configured Flask application instance
     """
     # Create Flask app
     flask_app = Flask(__name__)
+    flask_app.json = OrjsonProvider(flask_app)
 
     # Load configuration
     if config_name is None:
         config_name = os.environ.get('FLASK_ENV', 'development')
 
     flask_app.config.from_object(config[config_name])
+    if config_overrides:
+        flask_app.config.update(config_overrides)
 
     # Initialize extensions
-    mongo.init_app(flask_app)
+    mongo.init_app(flask_app, maxPoolSize=flask_app.config['MONGO_MAX_POOL_SIZE'])
     CORS(flask_app)
+    init_executor(flask_app)
 
     # Jinja2 filters
     @flask_app.template_filter('money')
@@ -3,14 +3,12 @@ Configuration file for Family Budget application.
 Loads settings from environment variables (via .env file in development).
 """
 import os
-from dataclasses import dataclass
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (development only)
 load_dotenv()
 
 
-@dataclass
 # pylint: disable=too-few-public-methods,invalid-name
 class Config:
     """Base configuration class."""
@@ -18,14 +16,23 @@ class Config:
     SECRET_KEY: str = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     # MongoDB settings
     MONGO_URI: str = os.environ.get('MONGO_URI') or 'mongodb://localhost:27017/budget_app'
+    # Upper bound on concurrent MongoDB connections shared by request threads
+    MONGO_MAX_POOL_SIZE: int = int(os.environ.get('MONGO_MAX_POOL_SIZE') or 100)
     # Flask-CORS settings
     CORS_HEADERS: str = 'Content-Type'
     # Application settings
     DEBUG: bool = os.environ.get('FLASK_ENV') == 'development'
     TESTING: bool = False
+    # Run slow follow-up work (e.g. batch categorization) off the request path
+    BACKGROUND_TASKS: bool = True
+    BACKGROUND_WORKERS: int = 4
+    # Insert CSV-imported transactions without waiting for server acknowledgement (w=0).
+    # Opt-in: per-batch insert errors go unreported; only a final count is checked.
+    UNACKNOWLEDGED_IMPORTS: bool = os.environ.get('UNACKNOWLEDGED_IMPORTS') == 'true'
+    # CSV rows parsed, categorized and inserted per batch when importing an upload
+    UPLOAD_BATCH_SIZE: int = int(os.environ.get('UPLOAD_BATCH_SIZE') or 1000)
 
 
-@dataclass
 # pylint: disable=too-few-public-methods
 class DevelopmentConfig(Config):
     """Development environment configuration."""
@@ -33,15 +40,16 @@ class DevelopmentConfig(Config):
     TESTING: bool = False
 
 
-@dataclass
 # pylint: disable=too-few-public-methods
 class TestingConfig(Config):
     """Testing environment configuration."""
     TESTING: bool = True
     MONGO_URI: str = 'mongodb://localhost:27017/budget_app_test'
+    # Keep side effects synchronous so tests can assert on them
+    BACKGROUND_TASKS: bool = False
+    UNACKNOWLEDGED_IMPORTS: bool = False
 
 
-@dataclass
 # pylint: disable=too-few-public-methods
 class ProductionConfig(Config):
     """Production environment configuration."""
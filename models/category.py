@@ -2,10 +2,15 @@
 Category model.
 Handles category data validation and helper methods.
 """
+import re
 from datetime import datetime, UTC
 
+from pymongo import ReturnDocument
+
 from utils.responses import doc_to_json
 
+_COLOR_RE = re.compile(r'#[0-9A-Fa-f]{6}')
+
 
 class Category:
     """
@@ -25,16 +30,23 @@ class Category:
         """
         Get the next auto-incrementing ID for a new category.
 
+        Atomically increments the 'category_id' counter document, so
+        concurrent creations never receive the same ID. init_db seeds the
+        counter with the highest existing category ID.
+
         Args:
             mongo: Flask-PyMongo instance
 
         Returns:
             int: Next available category ID
         """
-        highest = mongo.db.categories.find_one(sort=[('id', -1)])
-        if highest and 'id' in highest:
-            return highest['id'] + 1
-        return 1
+        counter = mongo.db.counters.find_one_and_update(
+            {'_id': 'category_id'},
+            {'$inc': {'seq': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return counter['seq']
 
     @staticmethod
     def create(
@@ -93,18 +105,7 @@ class Category:
         Returns:
             bool: True if valid hex color (#RRGGBB format)
         """
-        if not isinstance(color, str):
-            return False
-        color = color.strip()
-        if not color.startswith('#'):
-            return False
-        if len(color) != 7:
-            return False
-        try:
-            int(color[1:], 16)
-            return True
-        except ValueError:
-            return False
+        return isinstance(color, str) and _COLOR_RE.fullmatch(color.strip()) is not None
 
     @staticmethod
     def validate(category: dict) -> bool:
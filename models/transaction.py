@@ -2,8 +2,54 @@
 Transaction model.
 Handles transaction data validation and helper methods.
 """
+import re
 from datetime import datetime, UTC
 
+# YYYY-MM-DD or M/D/YYYY (D/M/YYYY is tried when the month is out of range)
+_DATE_RE = re.compile(r'(?:(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})/(\d{1,2})/(\d{4}))')
+_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y')
+# Fields converted to ISO strings by Transaction.to_json
+_DATETIME_FIELDS = frozenset({'date', 'upload_date'})
+# Query-only fields left out of Transaction.to_json
+_INTERNAL_FIELDS = frozenset({'description_upper'})
+
+
+def _parse_date(value: str) -> datetime:
+    """
+    Parse a date string in one of the _DATE_FORMATS.
+
+    The common shapes are matched with a precompiled regex and built
+    directly, avoiding strptime's format parsing and its exception on
+    each non-matching format. Anything else falls back to strptime.
+
+    Args:
+        value: Date string
+
+    Returns:
+        datetime: Parsed date
+
+    Raises:
+        ValueError: If the string matches none of the formats
+    """
+    if match := _DATE_RE.fullmatch(value):
+        year, month, day, first, second, slash_year = match.groups()
+        try:
+            if year:
+                return datetime(int(year), int(month), int(day))
+            try:
+                return datetime(int(slash_year), int(first), int(second))
+            except ValueError:
+                return datetime(int(slash_year), int(second), int(first))
+        except ValueError:
+            pass
+
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Could not parse date: {value}")
+
 
 class Transaction:
     """
@@ -12,6 +58,8 @@ class Transaction:
     Schema:
         date: datetime - Transaction date
         description: str - Transaction description (merchant name)
+        description_upper: str - Upper-cased description, indexed for
+            case-sensitive pattern lookups
         amount: float - Transaction amount (negative for expenses, positive for income)
         category_id: int - Category ID (reference to categories.id)
         source_file: str - Original CSV filename
@@ -36,6 +84,8 @@ class Transaction:
                 notes: str - Optional notes (default '')
                 auto_categorized: bool - Whether auto-categorized (default False)
                 confidence: float - Confidence score 0.0-1.0 (default 0.0)
+                upload_date: datetime - Import timestamp (default now); pass one
+                    shared value when creating a batch
 
         Returns:
             dict: Transaction document ready for MongoDB insertion
@@ -49,16 +99,10 @@ class Transaction:
         notes = optional.get('notes', '')
         auto_categorized = optional.get('auto_categorized', False)
         confidence = optional.get('confidence', 0.0)
+        upload_date = optional.get('upload_date') or datetime.now(UTC)
 
         if isinstance(date, str):
-            for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']:
-                try:
-                    date = datetime.strptime(date, fmt)
-                    break
-                except ValueError:
-                    continue
-            else:
-                raise ValueError(f"Could not parse date: {date}")
+            date = _parse_date(date)
 
         try:
             amount = float(amount)
@@ -71,14 +115,17 @@ class Transaction:
         if not 0.0 <= confidence <= 1.0:
             raise ValueError(f"Confidence must be between 0.0 and 1.0, got {confidence}")
 
+        description = str(description).strip()
+
         return {
             'date': date,
-            'description': str(description).strip(),
+            'description': description,
+            'description_upper': description.upper(),
             'amount': amount,
             'category_id': category_id,
             'account_id': account_id,
             'source_file': source_file,
-            'upload_date': datetime.now(UTC),
+            'upload_date': upload_date,
             'notes': str(notes).strip(),
             'auto_categorized': bool(auto_categorized),
             'confidence': float(confidence),
@@ -135,18 +182,16 @@ class Transaction:
         Returns:
             dict: JSON-serializable transaction
         """
-        result = transaction.copy()
-
-        if '_id' in result:
-            result['_id'] = str(result['_id'])
-
-        if 'date' in result and isinstance(result['date'], datetime):
-            result['date'] = result['date'].isoformat()
-
-        if 'upload_date' in result and isinstance(result['upload_date'], datetime):
-            result['upload_date'] = result['upload_date'].isoformat()
-
-        return result
+        # Convert while building the result rather than copying and then patching it
+        return {
+            key: (
+                str(value) if key == '_id'
+                else value.isoformat() if key in _DATETIME_FIELDS and isinstance(value, datetime)
+                else value
+            )
+            for key, value in transaction.items()
+            if key not in _INTERNAL_FIELDS
+        }
 
     @staticmethod
     def from_csv_row(row: dict, source_file: str) -> dict:
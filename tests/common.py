@@ -1,6 +1,7 @@
 """
 Test helper functions for common assertions and operations.
 """
+from models.transaction import Transaction
 
 
 def assert_single_item_response(response):
@@ -20,3 +21,69 @@ def assert_single_item_response(response):
     assert json_data['total'] == 1
     assert len(json_data['data']) == 1
     return json_data
+
+
+def seed_transactions(db, transactions):
+    """
+    Insert transactions directly, bypassing the API.
+
+    Documents are built with Transaction.create, as POST /api/transactions
+    does, and written with a single insert_many.
+
+    Args:
+        db: MongoDB database (the db fixture)
+        transactions: Iterable of mappings with date, description, amount
+            and optional Transaction.create fields (e.g. category_id)
+    """
+    db.transactions.insert_many([Transaction.create(**txn) for txn in transactions])
+
+
+def post_ok(client, url, doc, status=201):
+    """
+    POST a JSON document and assert that the request succeeded.
+
+    Args:
+        client: Flask test client
+        url: Endpoint to post to
+        doc: JSON body
+        status: Expected HTTP status code
+
+    Returns:
+        dict: The 'data' member of the decoded response
+    """
+    response = client.post(url, json=doc)
+    assert response.status_code == status
+    json_data = response.get_json()
+    assert json_data['success'] is True
+    return json_data['data']
+
+
+def assert_error_response(response, status_code, code):
+    """
+    Assert that API response is an error with the given status and code.
+
+    Checks the raw body rather than decoding it; responses are compact
+    orjson output, so the code appears exactly as '"code":"<code>"'.
+
+    Args:
+        response: Flask test client response object
+        status_code: Expected HTTP status code
+        code: Expected error code string
+    """
+    assert response.status_code == status_code
+    assert b'"success":false' in response.data
+    assert f'"code":"{code}"'.encode() in response.data
+
+
+def index_by(items, key):
+    """
+    Index a list of response items by one of their fields.
+
+    Args:
+        items: List of dicts (e.g. the 'data' member of a response)
+        key: Field whose value becomes the dict key
+
+    Returns:
+        dict: Mapping of each item's key value to the item
+    """
+    return {item[key]: item for item in items}
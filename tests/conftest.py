@@ -3,64 +3,164 @@ Pytest configuration and fixtures for Family Budget tests.
 """
 import os
 import pytest
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from flask import g
+from pymongo import DeleteMany, InsertOne
 
 from app import create_app
+from utils.cache import categorizer_cache, category_cache
 from utils.db import mongo
 from utils.db_init import init_db
 
+# pytest-xdist workers each get their own database so they can run in parallel
+TEST_DB = 'budget_app_test' + (
+    f"_{os.environ['PYTEST_XDIST_WORKER']}" if 'PYTEST_XDIST_WORKER' in os.environ else ''
+)
+
 
 @pytest.fixture(scope='session')
 def _app():
     """
     Create Flask application for testing.
     Uses a separate test database to avoid polluting production data.
+    One app context stays pushed for the whole session.
     """
     # Set test environment
     os.environ['FLASK_ENV'] = 'testing'
 
-    # Create app with test configuration
-    test_app = create_app('testing')
+    # Create app with test configuration and this worker's database
+    test_app = create_app(
+        'testing',
+        config_overrides={'MONGO_URI': f'mongodb://localhost:27017/{TEST_DB}'},
+    )
 
-    # Override database name for testing
-    test_app.config['MONGO_URI'] = 'mongodb://localhost:27017/budget_app_test'
+    ctx = test_app.app_context()
+    ctx.push()
 
     yield test_app
 
     # Cleanup: Drop test database after all tests
-    with test_app.app_context():
-        mongo.cx.drop_database('budget_app_test')
+    mongo.cx.drop_database(TEST_DB)
+    ctx.pop()
+
+
+@pytest.fixture(scope='session')
+def _seed_snapshot(_app):
+    """
+    Run init_db once on an empty database and snapshot every seeded collection.
+    Tests restore this snapshot instead of re-running init_db.
+
+    Documents are kept as RawBSONDocument: they are immutable, so every
+    reset can insert the same objects, and the driver sends their bytes
+    as-is without copying or re-encoding them.
+    """
+    mongo.cx.drop_database(TEST_DB)
+    init_db(mongo)
+    raw_options = CodecOptions(document_class=RawBSONDocument)
+    return {
+        name: list(mongo.db.get_collection(name, codec_options=raw_options).find())
+        for name in mongo.db.list_collection_names()
+        if not name.startswith('system.')
+    }
+
+
+@pytest.fixture(scope='session')
+def _test_client(_app):
+    """
+    One Flask test client shared by all tests.
+    The API sets no cookies, so the client carries no state between tests.
+    """
+    return _app.test_client()
+
+
+# Whether the database still holds the current module's shared read-only data
+_shared_state = {'intact': False}
+
+
+def _reset_database(snapshot):
+    """
+    Restore the database to the seeded snapshot and clear per-process state.
+    """
+    # Empty every collection. Keeping the collections (unlike
+    # drop_database) avoids rebuilding the catalog and indexes.
+    # Seeded collections are emptied and refilled with the default
+    # categories, account and counters in one ordered bulk_write.
+    for name in {*mongo.db.list_collection_names(), *snapshot}:
+        if name.startswith('system.'):
+            continue
+        documents = snapshot.get(name)
+        if documents:
+            mongo.db[name].bulk_write(
+                [DeleteMany({}), *(InsertOne(doc) for doc in documents)],
+                ordered=True,
+            )
+        else:
+            mongo.db[name].delete_many({})
+    category_cache.clear()
+    categorizer_cache.clear()
+
+    # Requests reuse the session app context, so start with an empty g
+    vars(g).clear()
 
 
 @pytest.fixture(scope='function')
-def client(_app):
+def client(_test_client, _seed_snapshot):
     """
     Flask test client for making API requests.
     Function-scoped: fresh database for each test.
     """
-    with _app.app_context():
-        # Clean database before each test
-        mongo.cx.drop_database('budget_app_test')
+    _shared_state['intact'] = False
+    _reset_database(_seed_snapshot)
+    return _test_client
 
-        # Re-initialize database with default categories
-        init_db(mongo)
 
-        # Return test client
-        yield _app.test_client()
+@pytest.fixture(scope='module')
+def _module_database(_seed_snapshot):
+    """
+    Reset the database once for the read-only tests of a module.
+    Module-scoped fixtures that seed shared data should depend on this.
+    """
+    _reset_database(_seed_snapshot)
+    _shared_state['intact'] = True
 
 
 @pytest.fixture(scope='function')
+def ro_client(_test_client, _module_database):  # pylint: disable=unused-argument
+    """
+    Flask test client for tests that only read the database.
+    The database is reset once per module, so every test using it must
+    leave the data unchanged, and must run before the module's tests that
+    use client (which resets the database under it).
+    """
+    assert _shared_state['intact'], (
+        'read-only test ran after a test using client in the same module'
+    )
+    return _test_client
+
+
+@pytest.fixture(scope='session')
 def db(_app):
     """
     Direct database access for test assertions.
     """
-    with _app.app_context():
-        yield mongo.db
+    return mongo.db
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
+def nonexistent_oid():
+    """
+    A valid ObjectId string that matches no document.
+    """
+    return str(ObjectId())
+
+
+@pytest.fixture(scope='session')
 def sample_transaction():
     """
     Sample transaction data for testing.
+    Shared by all tests - copy it before modifying.
     """
     return {
         'date': '2025-11-15',
@@ -71,10 +171,11 @@ def sample_transaction():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def sample_category():
     """
     Sample category data for testing.
+    Shared by all tests - copy it before modifying.
     """
     return {
         'name': 'Test Category',
@@ -84,12 +185,12 @@ def sample_category():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def bank_csv_content():
     """
-    Real Canadian bank CSV format for testing.
+    Real Canadian bank CSV format for testing, as encoded upload bytes.
     """
-    return """Account Type,Account Number,Transaction Date,Cheque Number,Description 1,Description 2,CAD$,USD$
+    return b"""Account Type,Account Number,Transaction Date,Cheque Number,Description 1,Description 2,CAD$,USD$
 Visa,4510154206791790,11/1/2025,,NETFLIX.COM Vancouver,,-27.59,
 Visa,4510154206791790,11/2/2025,,STEAM PURCHASE SEATTLE,,-20.69,
 Visa,4510154206791790,11/2/2025,,PrimeVideo.c*NK4SX54K2 www.amazon.ca,,-5.74,
@@ -99,9 +200,9 @@ Chequing,00170-5050885,11/4/2025,,E-TRANSFER SENT EGLISE CITE DE LA GRACE INC. F
 """
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def invalid_csv_content():
     """
-    Invalid CSV for testing error handling.
+    Invalid CSV for testing error handling, as encoded upload bytes.
     """
-    return """Wrong,Headers,Missing Required Value1,Value2,Value3"""
+    return b"""Wrong,Headers,Missing Required Value1,Value2,Value3"""
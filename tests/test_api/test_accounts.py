@@ -3,6 +3,8 @@ Tests for Accounts API endpoints.
 """
 import pytest
 
+from tests.common import assert_error_response, post_ok
+
 
 @pytest.mark.api
 class TestAccountsAPI:
@@ -24,8 +26,8 @@ class TestAccountsAPI:
 
     def test_list_accounts_ordered_by_id(self, client):
         """Test that accounts are returned sorted by ID ascending."""
-        client.post('/api/accounts', json={'name': 'Savings', 'type': 'savings'})
-        client.post('/api/accounts', json={'name': 'Visa', 'type': 'credit_card'})
+        post_ok(client, '/api/accounts', {'name': 'Savings', 'type': 'savings'})
+        post_ok(client, '/api/accounts', {'name': 'Visa', 'type': 'credit_card'})
 
         response = client.get('/api/accounts')
         data = response.get_json()
@@ -57,10 +59,7 @@ class TestAccountsAPI:
         """Test retrieving a non-existent account returns 404."""
         response = client.get('/api/accounts/999')
 
-        assert response.status_code == 404
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'NOT_FOUND'
+        assert_error_response(response, 404, 'NOT_FOUND')
 
     # ── POST /api/accounts ─────────────────────────────────────────
 
@@ -85,19 +84,19 @@ class TestAccountsAPI:
         """Test that creating an account without a name returns 400."""
         response = client.post('/api/accounts', json={'type': 'checking'})
 
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'INVALID_REQUEST'
+        assert_error_response(response, 400, 'INVALID_REQUEST')
 
     def test_create_account_missing_type(self, client):
         """Test that creating an account without a type returns 400."""
         response = client.post('/api/accounts', json={'name': 'My Account'})
 
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'INVALID_REQUEST'
+        assert_error_response(response, 400, 'INVALID_REQUEST')
+
+    def test_create_account_malformed_json(self, client):
+        """Test that a body that is not valid JSON returns the JSON error envelope."""
+        response = client.post('/api/accounts', data='{"name": ', content_type='application/json')
+
+        assert_error_response(response, 400, 'INVALID_REQUEST')
 
     def test_create_account_invalid_type(self, client):
         """Test that creating an account with an invalid type returns 400."""
@@ -106,10 +105,7 @@ class TestAccountsAPI:
             json={'name': 'My Account', 'type': 'not_a_real_type'},
         )
 
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'VALIDATION_ERROR'
+        assert_error_response(response, 400, 'VALIDATION_ERROR')
 
     # ── PUT /api/accounts/<id> ─────────────────────────────────────
 
@@ -130,39 +126,27 @@ class TestAccountsAPI:
         """Test updating a non-existent account returns 404."""
         response = client.put('/api/accounts/999', json={'name': 'Ghost'})
 
-        assert response.status_code == 404
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'NOT_FOUND'
+        assert_error_response(response, 404, 'NOT_FOUND')
 
     def test_update_account_no_valid_fields(self, client):
         """Test that sending only disallowed fields returns NO_UPDATES error."""
         response = client.put('/api/accounts/1', json={'id': 99, 'type': 'savings'})
 
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'NO_UPDATES'
+        assert_error_response(response, 400, 'NO_UPDATES')
 
     def test_update_account_no_body(self, client):
         """Test that an empty request body returns INVALID_REQUEST error."""
         response = client.put('/api/accounts/1', json={})
 
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'INVALID_REQUEST'
+        assert_error_response(response, 400, 'INVALID_REQUEST')
 
     # ── DELETE /api/accounts/<id> ──────────────────────────────────
 
     def test_delete_account_success(self, client):
         """Test deleting an account that has no associated transactions."""
-        client.post('/api/accounts', json={'name': 'Temp Account', 'type': 'savings'})
-        response = client.get('/api/accounts')
-        new_account_id = next(
-            account['id'] for account in response.get_json()['data']
-            if account['name'] == 'Temp Account'
-        )
+        new_account_id = post_ok(
+            client, '/api/accounts', {'name': 'Temp Account', 'type': 'savings'}
+        )['id']
 
         delete_response = client.delete(f'/api/accounts/{new_account_id}')
 
@@ -174,10 +158,7 @@ class TestAccountsAPI:
         """Test deleting a non-existent account returns 404."""
         response = client.delete('/api/accounts/999')
 
-        assert response.status_code == 404
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'NOT_FOUND'
+        assert_error_response(response, 404, 'NOT_FOUND')
 
     def test_delete_account_in_use(self, client):
         """Test that deleting an account referenced by transactions returns 409."""
@@ -199,7 +180,4 @@ class TestAccountsAPI:
 
         response = client.delete('/api/accounts/1')
 
-        assert response.status_code == 409
-        data = response.get_json()
-        assert data['success'] is False
-        assert data['error']['code'] == 'ACCOUNT_IN_USE'
+        assert_error_response(response, 409, 'ACCOUNT_IN_USE')
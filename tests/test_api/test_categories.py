@@ -3,14 +3,18 @@ Tests for Categories API endpoints.
 """
 import pytest
 
+from tests.common import assert_error_response, post_ok
+from utils.db import mongo
+from utils.db_init import init_db
+
 
 @pytest.mark.api
-class TestCategoriesAPI:
-    """Test category CRUD operations."""
+class TestCategoriesReadAPI:
+    """Test category endpoints that leave the database unchanged."""
 
-    def test_list_categories(self, client):
+    def test_list_categories(self, ro_client):
         """Test listing all categories (should have 7 defaults)."""
-        response = client.get('/api/categories')
+        response = ro_client.get('/api/categories')
 
         assert response.status_code == 200
         json_data = response.get_json()
@@ -24,10 +28,10 @@ class TestCategoriesAPI:
         assert 'Groceries' in category_names
         assert 'Gas' in category_names
 
-    def test_get_category_by_id(self, client):
+    def test_get_category_by_id(self, ro_client):
         """Test getting a specific category by ID."""
         # Get Groceries (ID 1)
-        response = client.get('/api/categories/1')
+        response = ro_client.get('/api/categories/1')
 
         assert response.status_code == 200
         json_data = response.get_json()
@@ -35,46 +39,24 @@ class TestCategoriesAPI:
         assert json_data['data']['id'] == 1
         assert json_data['data']['name'] == 'Groceries'
 
-    def test_get_category_not_found(self, client):
+    def test_get_category_not_found(self, ro_client):
         """Test getting non-existent category."""
-        response = client.get('/api/categories/999')
-
-        assert response.status_code == 404
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'NOT_FOUND'
-
-    def test_create_category(self, client, db, sample_category):
-        """Test creating a new category."""
-        response = client.post('/api/categories', json=sample_category)
+        response = ro_client.get('/api/categories/999')
 
-        assert response.status_code == 201
-        json_data = response.get_json()
-        assert json_data['success'] is True
-        assert 'created successfully' in json_data['message']
-        assert json_data['data']['name'] == sample_category['name']
-        assert json_data['data']['color'] == sample_category['color']
-        assert json_data['data']['id'] >= 7  # User categories start at ID 7
+        assert_error_response(response, 404, 'NOT_FOUND')
 
-        # Verify in database
-        categories = list(db.categories.find())
-        assert len(categories) == 8  # 7 defaults + 1 new
-
-    def test_create_category_missing_fields(self, client):
+    def test_create_category_missing_fields(self, ro_client):
         """Test creating category with missing required fields."""
         incomplete_data = {
             'name': 'Test Category'
             # Missing description, color
         }
 
-        response = client.post('/api/categories', json=incomplete_data)
+        response = ro_client.post('/api/categories', json=incomplete_data)
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'MISSING_FIELDS'
+        assert_error_response(response, 400, 'MISSING_FIELDS')
 
-    def test_create_category_invalid_color(self, client):
+    def test_create_category_invalid_color(self, ro_client):
         """Test creating category with invalid hex color."""
         invalid_data = {
             'name': 'Test Category',
@@ -83,12 +65,47 @@ class TestCategoriesAPI:
             'monthly_limit': 500.00
         }
 
-        response = client.post('/api/categories', json=invalid_data)
+        response = ro_client.post('/api/categories', json=invalid_data)
+
+        assert_error_response(response, 400, 'VALIDATION_ERROR')
+
+    def test_update_category_not_found(self, ro_client):
+        """Test updating non-existent category."""
+        response = ro_client.put('/api/categories/999', json={'name': 'Updated'})
+
+        assert_error_response(response, 404, 'NOT_FOUND')
+
+    def test_update_category_no_changes(self, ro_client):
+        """Test updating category with no valid fields."""
+        response = ro_client.put('/api/categories/1', json={})
+
+        assert_error_response(response, 400, 'INVALID_REQUEST')  # Empty JSON body
+
+    def test_delete_category_not_found(self, ro_client):
+        """Test deleting non-existent category."""
+        response = ro_client.delete('/api/categories/999')
+
+        assert_error_response(response, 404, 'NOT_FOUND')
+
+
+@pytest.mark.api
+class TestCategoriesAPI:
+    """Test category CRUD operations."""
+
+    def test_create_category(self, client, db, sample_category):
+        """Test creating a new category."""
+        response = client.post('/api/categories', json=sample_category)
 
-        assert response.status_code == 400
+        assert response.status_code == 201
         json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'VALIDATION_ERROR'
+        assert json_data['success'] is True
+        assert 'created successfully' in json_data['message']
+        assert json_data['data']['name'] == sample_category['name']
+        assert json_data['data']['color'] == sample_category['color']
+        assert json_data['data']['id'] >= 7  # User categories start at ID 7
+
+        # Verify in database
+        assert db.categories.count_documents({}) == 8  # 7 defaults + 1 new
 
     def test_update_category(self, client):
         """Test updating a category."""
@@ -106,29 +123,10 @@ class TestCategoriesAPI:
         assert json_data['data']['name'] == 'Updated Groceries'
         assert json_data['data']['monthly_limit'] == 750.00
 
-    def test_update_category_not_found(self, client):
-        """Test updating non-existent category."""
-        response = client.put('/api/categories/999', json={'name': 'Updated'})
-
-        assert response.status_code == 404
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'NOT_FOUND'
-
-    def test_update_category_no_changes(self, client):
-        """Test updating category with no valid fields."""
-        response = client.put('/api/categories/1', json={})
-
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_REQUEST'  # Empty JSON body
-
     def test_delete_user_category(self, client, db, sample_category):
         """Test deleting a user-created category (ID >= 7)."""
         # Create a category first
-        create_response = client.post('/api/categories', json=sample_category)
-        category_id = create_response.get_json()['data']['id']
+        category_id = post_ok(client, '/api/categories', sample_category)['id']
 
         # Delete it
         response = client.delete(f'/api/categories/{category_id}')
@@ -139,17 +137,15 @@ class TestCategoriesAPI:
         assert 'deleted successfully' in json_data['message']
 
         # Verify deleted from database
-        category = db.categories.find_one({'id': category_id})
-        assert category is None
+        assert db.categories.count_documents({'id': category_id}) == 0
 
     def test_delete_category_in_use(self, client, sample_category):
         """Test deleting category that has transactions."""
         # Create category
-        create_response = client.post('/api/categories', json=sample_category)
-        category_id = create_response.get_json()['data']['id']
+        category_id = post_ok(client, '/api/categories', sample_category)['id']
 
         # Create transaction with this category
-        client.post('/api/transactions', json={
+        post_ok(client, '/api/transactions', {
             'date': '2025-11-01',
             'description': 'Test transaction',
             'amount': -100.00,
@@ -159,38 +155,41 @@ class TestCategoriesAPI:
         # Try to delete category
         response = client.delete(f'/api/categories/{category_id}')
 
-        assert response.status_code == 409  # Conflict
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'CATEGORY_IN_USE'
-
-    def test_delete_category_not_found(self, client):
-        """Test deleting non-existent category."""
-        response = client.delete('/api/categories/999')
-
-        assert response.status_code == 404
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'NOT_FOUND'
+        assert_error_response(response, 409, 'CATEGORY_IN_USE')  # Conflict
 
     def test_category_auto_increment_id(self, client):
         """Test that new categories get auto-incremented IDs."""
         # Create first user category
-        response1 = client.post('/api/categories', json={
+        id1 = post_ok(client, '/api/categories', {
             'name': 'Category 1',
             'description': 'First',
             'color': '#FF0000'
-        })
-        id1 = response1.get_json()['data']['id']
+        })['id']
 
         # Create second user category
-        response2 = client.post('/api/categories', json={
+        id2 = post_ok(client, '/api/categories', {
             'name': 'Category 2',
             'description': 'Second',
             'color': '#00FF00'
-        })
-        id2 = response2.get_json()['data']['id']
+        })['id']
 
         # IDs should be sequential
         assert id1 == 7  # First user category
         assert id2 == 8  # Second user category
+
+    @pytest.mark.usefixtures('client')
+    def test_init_db_with_duplicate_names(self, db):
+        """Test that startup survives category names left duplicated by older versions."""
+        db.categories.drop_index('name_1')
+        try:
+            db.categories.insert_one({'id': 99, 'name': 'Groceries', 'color': '#000000'})
+
+            init_db(mongo)
+
+            indexes = db.categories.index_information()
+            assert 'name_1' not in indexes
+            assert indexes['id_1']['unique'] is True
+            assert 'source_file_1' in db.transactions.index_information()
+        finally:
+            db.categories.delete_one({'id': 99})
+            db.categories.create_index('name', unique=True)
@@ -1,36 +1,47 @@
 """
 Tests for Charts API endpoints.
 """
+from datetime import datetime
+from types import MappingProxyType
+
 import pytest
 
+from models.transaction import Transaction
+from tests.common import assert_error_response, index_by, seed_transactions
+from utils.aggregations import EXCLUDED_CATEGORY_IDS, Aggregations
+from utils.cache import category_cache
+from utils.db import mongo
+
+
+# Shared by every test in the module, so the payloads are read-only
+_SAMPLE_TRANSACTIONS = tuple(MappingProxyType(txn) for txn in (
+    # November 2025 - Groceries
+    {'date': '2025-11-05', 'description': 'COSTCO', 'amount': -150.00, 'category_id': 1},
+    {'date': '2025-11-12', 'description': 'WALMART', 'amount': -80.00, 'category_id': 1},
+    # November 2025 - Gas
+    {'date': '2025-11-07', 'description': 'SHELL GAS', 'amount': -45.00, 'category_id': 2},
+    # November 2025 - Entertainment
+    {'date': '2025-11-15', 'description': 'NETFLIX', 'amount': -15.99, 'category_id': 4},
+    # December 2025 - Groceries
+    {'date': '2025-12-03', 'description': 'COSTCO', 'amount': -200.00, 'category_id': 1},
+    # December 2025 - Gas
+    {'date': '2025-12-10', 'description': 'SHELL GAS', 'amount': -50.00, 'category_id': 2},
+))
+
+
+@pytest.fixture(scope='module')
+def _sample_transactions(_module_database, db):  # pylint: disable=unused-argument
+    """Create sample transactions once for the whole module."""
+    seed_transactions(db, _SAMPLE_TRANSACTIONS)
+
 
 @pytest.mark.api
 class TestChartsAPI:
     """Test chart data aggregation endpoints."""
 
-    @pytest.fixture
-    def _sample_transactions(self, client):
-        """Create sample transactions for chart testing."""
-        transactions = [
-            # November 2025 - Groceries
-            {'date': '2025-11-05', 'description': 'COSTCO', 'amount': -150.00, 'category_id': 1},
-            {'date': '2025-11-12', 'description': 'WALMART', 'amount': -80.00, 'category_id': 1},
-            # November 2025 - Gas
-            {'date': '2025-11-07', 'description': 'SHELL GAS', 'amount': -45.00, 'category_id': 2},
-            # November 2025 - Entertainment
-            {'date': '2025-11-15', 'description': 'NETFLIX', 'amount': -15.99, 'category_id': 4},
-            # December 2025 - Groceries
-            {'date': '2025-12-03', 'description': 'COSTCO', 'amount': -200.00, 'category_id': 1},
-            # December 2025 - Gas
-            {'date': '2025-12-10', 'description': 'SHELL GAS', 'amount': -50.00, 'category_id': 2},
-        ]
-
-        for txn in transactions:
-            client.post('/api/transactions', json=txn)
-
-    def test_monthly_chart(self, client, _sample_transactions):
+    def test_monthly_chart(self, ro_client, _sample_transactions):
         """Test getting monthly spending breakdown."""
-        response = client.get('/api/charts/monthly/2025/11')
+        response = ro_client.get('/api/charts/monthly/2025/11')
 
         assert response.status_code == 200
         json_data = response.get_json()
@@ -44,18 +55,15 @@ class TestChartsAPI:
         assert data_by_category.get('Groceries') == -230.00  # 150 + 80
         assert data_by_category.get('Gas') == -45.00
 
-    def test_monthly_chart_invalid_month(self, client):
+    def test_monthly_chart_invalid_month(self, ro_client):
         """Test monthly chart with invalid month number."""
-        response = client.get('/api/charts/monthly/2025/13')  # Invalid month
+        response = ro_client.get('/api/charts/monthly/2025/13')  # Invalid month
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_MONTH'
+        assert_error_response(response, 400, 'INVALID_MONTH')
 
-    def test_quarterly_chart(self, client, _sample_transactions):
+    def test_quarterly_chart(self, ro_client, _sample_transactions):
         """Test getting quarterly spending breakdown."""
-        response = client.get('/api/charts/quarterly/2025/4')  # Q4: Oct-Dec
+        response = ro_client.get('/api/charts/quarterly/2025/4')  # Q4: Oct-Dec
 
         assert response.status_code == 200
         json_data = response.get_json()
@@ -68,18 +76,15 @@ class TestChartsAPI:
         data_by_category = {item['category']: item['total'] for item in json_data['data']}
         assert data_by_category.get('Groceries') == -430.00  # 150 + 80 + 200
 
-    def test_quarterly_chart_invalid_quarter(self, client):
+    def test_quarterly_chart_invalid_quarter(self, ro_client):
         """Test quarterly chart with invalid quarter number."""
-        response = client.get('/api/charts/quarterly/2025/5')  # Invalid quarter
+        response = ro_client.get('/api/charts/quarterly/2025/5')  # Invalid quarter
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_QUARTER'
+        assert_error_response(response, 400, 'INVALID_QUARTER')
 
-    def test_annual_chart(self, client, _sample_transactions):
+    def test_annual_chart(self, ro_client, _sample_transactions):
         """Test getting annual spending breakdown."""
-        response = client.get('/api/charts/annual/2025')
+        response = ro_client.get('/api/charts/annual/2025')
 
         assert response.status_code == 200
         json_data = response.get_json()
@@ -91,50 +96,9 @@ class TestChartsAPI:
         total_spending = sum(item['total'] for item in json_data['data'])
         assert total_spending == -540.99  # Sum of all transactions
 
-    def test_budget_status(self, client, db, _sample_transactions):
-        """Test getting budget status (actual vs limit)."""
-        # Set monthly limit for Groceries
-        db.categories.update_one(
-            {'id': 1},
-            {'$set': {'monthly_limit': 300.00}}
-        )
-
-        response = client.get('/api/budget/status/2025/11')
-
-        assert response.status_code == 200
-        json_data = response.get_json()
-        assert json_data['success'] is True
-
-        # Find Groceries in response
-        groceries = next((item for item in json_data['data'] if item['category'] == 'Groceries'), None)
-        assert groceries is not None
-        assert groceries['budget'] == 300.00
-        assert groceries['actual'] == 230.00  # Absolute value
-        assert groceries['remaining'] == 70.00
-        assert groceries['percentage'] < 100  # Under budget
-        assert groceries['status'] in ['ok', 'warning']
-
-    def test_budget_status_over_budget(self, client, db, _sample_transactions):
-        """Test budget status when over budget."""
-        # Set monthly limit lower than actual spending
-        db.categories.update_one(
-            {'id': 1},
-            {'$set': {'monthly_limit': 200.00}}  # Less than actual 230
-        )
-
-        response = client.get('/api/budget/status/2025/11')
-
-        assert response.status_code == 200
-        json_data = response.get_json()
-
-        # Find Groceries in response
-        groceries = next((item for item in json_data['data'] if item['category'] == 'Groceries'), None)
-        assert groceries['percentage'] > 100  # Over budget
-        assert groceries['status'] == 'over'
-
-    def test_spending_trend(self, client, _sample_transactions):
+    def test_spending_trend(self, ro_client, _sample_transactions):
         """Test getting spending trend over months."""
-        response = client.get('/api/charts/trend?year=2025&months=3')
+        response = ro_client.get('/api/charts/trend?year=2025&months=3')
 
         assert response.status_code == 200
         json_data = response.get_json()
@@ -143,18 +107,15 @@ class TestChartsAPI:
         assert json_data['months'] == 3
         assert len(json_data['data']) <= 3  # Up to 3 months of data
 
-    def test_spending_trend_invalid_params(self, client):
+    def test_spending_trend_invalid_params(self, ro_client):
         """Test spending trend with invalid parameters."""
-        response = client.get('/api/charts/trend?months=50')  # Invalid: too many months
+        response = ro_client.get('/api/charts/trend?months=50')  # Invalid: too many months
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_PARAMETER'
+        assert_error_response(response, 400, 'INVALID_PARAMETER')
 
-    def test_top_merchants(self, client, _sample_transactions):
+    def test_top_merchants(self, ro_client, _sample_transactions):
         """Test getting top merchants by spending."""
-        response = client.get('/api/charts/top-merchants?year=2025&limit=5')
+        response = ro_client.get('/api/charts/top-merchants?year=2025&limit=5')
 
         assert response.status_code == 200
         json_data = response.get_json()
@@ -167,9 +128,9 @@ class TestChartsAPI:
             totals = [abs(item['total']) for item in json_data['data']]
             assert totals == sorted(totals, reverse=True)  # Should be in descending order
 
-    def test_top_merchants_with_month(self, client, _sample_transactions):
+    def test_top_merchants_with_month(self, ro_client, _sample_transactions):
         """Test top merchants filtered by month."""
-        response = client.get('/api/charts/top-merchants?year=2025&month=11&limit=3')
+        response = ro_client.get('/api/charts/top-merchants?year=2025&month=11&limit=3')
 
         assert response.status_code == 200
         json_data = response.get_json()
@@ -180,11 +141,142 @@ class TestChartsAPI:
         merchant_names = [item['merchant'] for item in json_data['data']]
         assert len(merchant_names) <= 3
 
-    def test_top_merchants_invalid_limit(self, client):
+    @pytest.mark.parametrize('start, end', [
+        ((2025, 11, 1), (2025, 12, 31, 23, 59, 59)),  # whole months
+        ((2025, 11, 10), (2025, 12, 5)),              # partial months
+    ])
+    def test_dashboard_matches_separate_aggregations(self, ro_client,
+                                                     _sample_transactions, start, end):
+        """Test the fused dashboard query returns the same data as the separate ones."""
+        start_date, end_date = datetime(*start), datetime(*end)
+
+        stats, category_data = Aggregations.dashboard(mongo, start_date, end_date)
+
+        assert stats == Aggregations.get_summary_stats(mongo, start_date, end_date)
+        assert category_data == Aggregations.aggregate_by_category(mongo, start_date, end_date)
+        assert stats['transaction_count'] > 0
+
+    def test_top_merchants_invalid_limit(self, ro_client):
         """Test top merchants with invalid limit."""
-        response = client.get('/api/charts/top-merchants?limit=200')  # Exceeds max 100
+        response = ro_client.get('/api/charts/top-merchants?limit=200')  # Exceeds max 100
+
+        assert_error_response(response, 400, 'INVALID_PARAMETER')
+
+
+@pytest.mark.api
+class TestBudgetStatusAPI:
+    """Test budget status (actual vs limit)."""
+
+    @pytest.mark.parametrize('limit,statuses,over_budget', [
+        (300.00, ('ok', 'warning'), False),
+        (200.00, ('over',), True),  # Less than actual 230
+    ])
+    def test_budget_status(self, client, db, limit, statuses, over_budget):
+        """Test budget status under and over the Groceries limit."""
+        # Writes the limit, so each case uses client for a fresh database
+        seed_transactions(db, _SAMPLE_TRANSACTIONS)
+        db.categories.update_one(
+            {'id': 1},
+            {'$set': {'monthly_limit': limit}}
+        )
+        category_cache.clear()  # Written directly, not through the API
 
-        assert response.status_code == 400
+        response = client.get('/api/budget/status/2025/11')
+
+        assert response.status_code == 200
         json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_PARAMETER'
+        assert json_data['success'] is True
+
+        # Find Groceries in response
+        groceries = index_by(json_data['data'], 'category')['Groceries']
+        assert groceries['budget'] == limit
+        assert groceries['actual'] == 230.00  # Absolute value
+        assert groceries['remaining'] == max(0, limit - 230.00)
+        assert (groceries['percentage'] > 100) is over_budget
+        assert groceries['status'] in statuses
+
+
+@pytest.mark.api
+class TestMonthlySummaries:
+    """Test the materialized monthly summaries against the transactions."""
+
+    @staticmethod
+    def _raw_totals(db, start_date, end_date):
+        """Group the transactions directly, bypassing the summaries."""
+        return {
+            result['_id']: (round(result['total'], 2), result['count'])
+            for result in db.transactions.aggregate([
+                {'$match': {
+                    'date': {'$gte': start_date, '$lte': end_date},
+                    'category_id': {'$nin': EXCLUDED_CATEGORY_IDS},
+                }},
+                {'$group': {
+                    '_id': '$category_id',
+                    'total': {'$sum': '$amount'},
+                    'count': {'$sum': 1},
+                }},
+            ])
+        }
+
+    @staticmethod
+    def _summary_totals(start_date, end_date):
+        """Per-category totals as served from the summaries."""
+        return {
+            item['category_id']: (round(item['total'], 2), item['count'])
+            for item in Aggregations.aggregate_by_category(mongo, start_date, end_date)
+        }
+
+    @pytest.mark.usefixtures('client')
+    def test_summaries_match_raw_transactions(self, db):
+        """Test that stored summaries hold the same totals as a raw $group."""
+        seed_transactions(db, _SAMPLE_TRANSACTIONS)
+        start_date, end_date = datetime(2025, 11, 1), datetime(2025, 12, 31, 23, 59, 59)
+
+        self._summary_totals(start_date, end_date)  # Builds and stores the months
+
+        assert db.monthly_summaries.count_documents({'categories': {'$exists': True}}) == 2
+        raw_totals = self._raw_totals(db, start_date, end_date)
+        assert self._summary_totals(start_date, end_date) == raw_totals
+
+    def test_write_invalidates_summary(self, client, db):
+        """Test that a month read, written to and read again reflects the write."""
+        seed_transactions(db, _SAMPLE_TRANSACTIONS)
+        start_date, end_date = datetime(2025, 11, 1), datetime(2025, 11, 30, 23, 59, 59)
+        before = self._summary_totals(start_date, end_date)
+
+        client.post('/api/transactions', json={
+            'date': '2025-11-20', 'description': 'SHELL GAS', 'amount': -30.00, 'category_id': 2
+        })
+
+        after = self._summary_totals(start_date, end_date)
+        assert after[2] == (before[2][0] - 30.00, before[2][1] + 1)
+        assert after == self._raw_totals(db, start_date, end_date)
+
+    @pytest.mark.usefixtures('client')
+    def test_rebuild_racing_a_write_is_not_stored(self, db, monkeypatch):
+        """Test that a rebuild overtaken by an invalidation does not store stale totals."""
+        transactions = db.transactions
+        transactions.insert_many([Transaction.create(
+            date='2025-11-05', description='SHELL GAS', amount=-45.00, category_id=2
+        )])
+
+        class _WriteDuringAggregate:  # pylint: disable=too-few-public-methods
+            """Lands a write and its invalidation between the rebuild's read and store."""
+
+            def aggregate(self, pipeline):
+                """Aggregate, then write to the month being rebuilt."""
+                results = list(transactions.aggregate(pipeline))
+                transactions.insert_many([Transaction.create(
+                    date='2025-11-20', description='SHELL GAS', amount=-30.00, category_id=2
+                )])
+                Aggregations.invalidate_monthly_summaries(mongo, [datetime(2025, 11, 20)])
+                return results
+
+        monkeypatch.setattr(mongo.db, 'transactions', _WriteDuringAggregate())
+        stale = Aggregations._monthly_summaries(mongo, [(2025, 11)])
+        monkeypatch.undo()
+
+        assert stale[0]['categories'] == [{'category_id': 2, 'total': -45.00, 'count': 1}]
+        assert 'categories' not in db.monthly_summaries.find_one({'_id': '2025-11'})
+        fresh = Aggregations._monthly_summaries(mongo, [(2025, 11)])
+        assert fresh[0]['categories'] == [{'category_id': 2, 'total': -75.00, 'count': 2}]
@@ -1,10 +1,14 @@
 """
 Tests for Transactions API endpoints.
 """
+import json
+
 import pytest
 from bson import ObjectId
 
-from tests.common import assert_single_item_response
+from tests.common import (
+    assert_error_response, assert_single_item_response, post_ok, seed_transactions,
+)
 
 
 @pytest.mark.api
@@ -23,8 +27,7 @@ class TestTransactionsAPI:
         assert json_data['data']['amount'] == sample_transaction['amount']
 
         # Verify in database
-        transactions = list(db.transactions.find())
-        assert len(transactions) == 1
+        assert db.transactions.count_documents({}) == 1
 
     def test_create_transaction_missing_fields(self, client):
         """Test creating transaction with missing required fields."""
@@ -35,26 +38,20 @@ class TestTransactionsAPI:
 
         response = client.post('/api/transactions', json=incomplete_data)
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'MISSING_FIELDS'
+        assert_error_response(response, 400, 'MISSING_FIELDS')
 
     def test_create_transaction_invalid_category(self, client, sample_transaction):
         """Test creating transaction with non-existent category."""
-        sample_transaction['category_id'] = 999  # Non-existent category
+        transaction = {**sample_transaction, 'category_id': 999}  # Non-existent category
 
-        response = client.post('/api/transactions', json=sample_transaction)
+        response = client.post('/api/transactions', json=transaction)
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_CATEGORY_ID'
+        assert_error_response(response, 400, 'INVALID_CATEGORY_ID')
 
     def test_list_transactions(self, client, sample_transaction):
         """Test listing all transactions."""
         # Create a transaction first
-        client.post('/api/transactions', json=sample_transaction)
+        post_ok(client, '/api/transactions', sample_transaction)
 
         response = client.get('/api/transactions')
         assert_single_item_response(response)
@@ -84,7 +81,7 @@ class TestTransactionsAPI:
         ]
 
         for txn in transactions:
-            client.post('/api/transactions', json=txn)
+            post_ok(client, '/api/transactions', txn)
 
         # Filter by date range
         response = client.get('/api/transactions?start_date=2025-11-01&end_date=2025-11-30')
@@ -96,15 +93,17 @@ class TestTransactionsAPI:
         json_data = response.get_json()
         assert json_data['count'] == 2
 
-    def test_list_transactions_pagination(self, client):
+    def test_list_transactions_pagination(self, client, db):
         """Test transaction list pagination."""
         # Create 15 transactions
-        for i in range(15):
-            client.post('/api/transactions', json={
+        seed_transactions(db, [
+            {
                 'date': '2025-11-01',
                 'description': f'Transaction {i}',
                 'amount': -10.00 * i
-            })
+            }
+            for i in range(15)
+        ])
 
         # Get first page
         response = client.get('/api/transactions?limit=10&offset=0')
@@ -121,8 +120,7 @@ class TestTransactionsAPI:
     def test_get_transaction(self, client, sample_transaction):
         """Test getting a single transaction by ID."""
         # Create transaction
-        create_response = client.post('/api/transactions', json=sample_transaction)
-        transaction_id = create_response.get_json()['data']['_id']
+        transaction_id = post_ok(client, '/api/transactions', sample_transaction)['_id']
 
         # Get transaction
         response = client.get(f'/api/transactions/{transaction_id}')
@@ -132,32 +130,24 @@ class TestTransactionsAPI:
         assert json_data['success'] is True
         assert json_data['data']['_id'] == transaction_id
         assert json_data['data']['description'] == sample_transaction['description']
+        assert json_data['data']['upload_date'] is not None
 
-    def test_get_transaction_not_found(self, client):
+    def test_get_transaction_not_found(self, client, nonexistent_oid):
         """Test getting non-existent transaction."""
-        fake_id = str(ObjectId())
+        response = client.get(f'/api/transactions/{nonexistent_oid}')
 
-        response = client.get(f'/api/transactions/{fake_id}')
-
-        assert response.status_code == 404
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'NOT_FOUND'
+        assert_error_response(response, 404, 'NOT_FOUND')
 
     def test_get_transaction_invalid_id(self, client):
         """Test getting transaction with invalid ObjectId format."""
         response = client.get('/api/transactions/invalid-id')
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_ID'
+        assert_error_response(response, 400, 'INVALID_ID')
 
     def test_update_transaction(self, client, sample_transaction):
         """Test updating a transaction."""
         # Create transaction
-        create_response = client.post('/api/transactions', json=sample_transaction)
-        transaction_id = create_response.get_json()['data']['_id']
+        transaction_id = post_ok(client, '/api/transactions', sample_transaction)['_id']
 
         # Update transaction
         update_data = {
@@ -174,24 +164,36 @@ class TestTransactionsAPI:
         assert json_data['data']['description'] == 'Updated description'
         assert json_data['data']['amount'] == -999.99
         assert json_data['data']['category_id'] == 1
+        assert 'description_upper' not in json_data['data']
 
-    def test_update_transaction_not_found(self, client):
+    def test_update_categorizes_similar_transactions(self, client, db):
+        """Test categorizing one transaction applies to similar uncategorized ones."""
+        seed_transactions(db, [
+            {'date': '2025-11-01', 'description': 'COSTCO WHOLESALE #123', 'amount': -80.0},
+            {'date': '2025-11-08', 'description': 'Costco Wholesale #456', 'amount': -45.0},
+            {'date': '2025-11-09', 'description': 'NETFLIX.COM', 'amount': -15.0},
+        ])
+        transaction = db.transactions.find_one({'description': 'COSTCO WHOLESALE #123'})
+
+        response = client.put(f'/api/transactions/{transaction["_id"]}', json={'category_id': 5})
+
+        assert response.status_code == 200
+        assert '1 similar transaction(s)' in response.get_json()['message']
+        assert db.transactions.count_documents({'category_id': 5}) == 2
+        assert db.transactions.find_one({'description': 'NETFLIX.COM'})['category_id'] == 0
+
+    def test_update_transaction_not_found(self, client, nonexistent_oid):
         """Test updating non-existent transaction."""
-        fake_id = str(ObjectId())
         update_data = {'description': 'Updated'}
 
-        response = client.put(f'/api/transactions/{fake_id}', json=update_data)
+        response = client.put(f'/api/transactions/{nonexistent_oid}', json=update_data)
 
-        assert response.status_code == 404
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'NOT_FOUND'
+        assert_error_response(response, 404, 'NOT_FOUND')
 
     def test_delete_transaction(self, client, db, sample_transaction):
         """Test deleting a transaction."""
         # Create transaction
-        create_response = client.post('/api/transactions', json=sample_transaction)
-        transaction_id = create_response.get_json()['data']['_id']
+        transaction_id = post_ok(client, '/api/transactions', sample_transaction)['_id']
 
         # Delete transaction
         response = client.delete(f'/api/transactions/{transaction_id}')
@@ -202,31 +204,34 @@ class TestTransactionsAPI:
         assert 'deleted successfully' in json_data['message']
 
         # Verify deleted from database
-        transactions = list(db.transactions.find())
-        assert len(transactions) == 0
+        assert db.transactions.count_documents({}) == 0
 
-    def test_delete_transaction_not_found(self, client):
+    def test_delete_transaction_not_found(self, client, nonexistent_oid):
         """Test deleting non-existent transaction."""
-        fake_id = str(ObjectId())
+        response = client.delete(f'/api/transactions/{nonexistent_oid}')
 
-        response = client.delete(f'/api/transactions/{fake_id}')
-
-        assert response.status_code == 404
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'NOT_FOUND'
+        assert_error_response(response, 404, 'NOT_FOUND')
 
     def test_bulk_delete_transactions(self, client, db):
         """Test bulk deleting multiple transactions."""
-        # Create 3 transactions
-        ids = []
-        for i in range(3):
-            response = client.post('/api/transactions', json={
+        # Create 3 transactions through the API from pre-encoded bodies
+        bodies = [
+            json.dumps({
                 'date': '2025-11-01',
                 'description': f'Transaction {i}',
                 'amount': -10.00 * i
             })
-            ids.append(response.get_json()['data']['_id'])
+            for i in range(3)
+        ]
+        ids = [
+            client.post(
+                '/api/transactions',
+                data=body,
+                content_type='application/json',
+                buffered=True,
+            ).get_json()['data']['_id']
+            for body in bodies
+        ]
 
         # Bulk delete
         response = client.delete('/api/transactions/bulk', json={'ids': ids})
@@ -237,8 +242,7 @@ class TestTransactionsAPI:
         assert json_data['deleted_count'] == 3
 
         # Verify all deleted
-        transactions = list(db.transactions.find())
-        assert len(transactions) == 0
+        assert db.transactions.count_documents({}) == 0
 
     def test_bulk_delete_invalid_ids(self, client):
         """Test bulk delete with invalid IDs."""
@@ -246,7 +250,49 @@ class TestTransactionsAPI:
             'ids': ['invalid-id']
         })
 
-        assert response.status_code == 400
+        assert_error_response(response, 400, 'INVALID_ID')
+
+    def test_bulk_delete_too_many_ids(self, client):
+        """Test bulk delete rejects requests above the per-request ID cap."""
+        response = client.delete('/api/transactions/bulk', json={
+            'ids': [str(ObjectId()) for _ in range(1001)]
+        })
+
+        assert_error_response(response, 400, 'TOO_MANY_IDS')
+
+    def test_list_transactions_streamed_without_limit(self, client, db):
+        """Test that limit=0 streams every transaction with count and total."""
+        seed_transactions(db, [
+            {
+                'date': '2025-11-01',
+                'description': f'Transaction {i}',
+                'amount': -10.00 * i
+            }
+            for i in range(3)
+        ])
+
+        response = client.get('/api/transactions?limit=0')
+
+        assert response.status_code == 200
         json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_ID'
+        assert json_data['success'] is True
+        assert json_data['count'] == 3
+        assert json_data['total'] == 3
+        assert len(json_data['data']) == 3
+        assert all(isinstance(txn['_id'], str) for txn in json_data['data'])
+
+    def test_list_transactions_include_category(self, client):
+        """Test that include=category embeds the category name and color."""
+        client.post('/api/transactions', json={
+            'date': '2025-11-01',
+            'description': 'COSTCO',
+            'amount': -100.00,
+            'category_id': 8
+        })
+
+        response = client.get('/api/transactions?include=category')
+
+        assert response.status_code == 200
+        category = response.get_json()['data'][0]['category']
+        assert category['name'] == 'Groceries'
+        assert category['color'] == '#4CAF50'
@@ -2,9 +2,13 @@
 Tests for CSV upload API endpoints.
 """
 import io
+from datetime import datetime
+
 import pytest
 
-from tests.common import assert_single_item_response
+from tests.common import assert_error_response, assert_single_item_response
+from utils import transaction_importer
+from utils.db import mongo
 
 
 @pytest.mark.api
@@ -15,7 +19,7 @@ class TestUploadCSV:
         """Test uploading a valid Canadian bank CSV file."""
         # Create file-like object
         data = {
-            'file': (io.BytesIO(bank_csv_content.encode('utf-8')), 'bank_transactions.csv')
+            'file': (io.BytesIO(bank_csv_content), 'bank_transactions.csv')
         }
 
         # Upload CSV
@@ -34,8 +38,7 @@ class TestUploadCSV:
         assert json_data['data']['filename'] == 'bank_transactions.csv'
 
         # Verify transactions were saved to database
-        transactions = list(db.transactions.find())
-        assert len(transactions) == 6
+        assert db.transactions.count_documents({}) == 6
 
         # Verify upload record was created
         uploads = list(db.uploads.find())
@@ -43,15 +46,70 @@ class TestUploadCSV:
         assert uploads[0]['filename'] == 'bank_transactions.csv'
         assert uploads[0]['row_count'] == 6
         assert uploads[0]['status'] == 'processed'
+        # The record shares its upload_date with the transactions it imported
+        assert db.transactions.count_documents({'upload_date': uploads[0]['upload_date']}) == 6
+
+    def test_upload_unacknowledged_imports(self, client, db, bank_csv_content, monkeypatch):
+        """Test that a w=0 import is confirmed before the upload is recorded."""
+        monkeypatch.setitem(client.application.config, 'UNACKNOWLEDGED_IMPORTS', True)
+        monkeypatch.setitem(client.application.config, 'UPLOAD_BATCH_SIZE', 4)
+
+        response = client.post(
+            '/api/upload/csv',
+            data={'file': (io.BytesIO(bank_csv_content), 'bank_transactions.csv')},
+            content_type='multipart/form-data'
+        )
+
+        assert response.status_code == 201
+        assert response.get_json()['data']['total_rows'] == 6
+        # Checked right away: the final count already waited for every batch
+        assert db.transactions.count_documents({'source_file': 'bank_transactions.csv'}) == 6
+        assert db.uploads.find_one()['status'] == 'processed'
+
+    def test_upload_unacknowledged_shortfall_recorded_as_failed(self, client, db,
+                                                               bank_csv_content, monkeypatch):
+        """Test that w=0 batches that never land fail the import but keep an upload record."""
+        transactions = db.transactions
+
+        class _LostWrites:  # pylint: disable=too-few-public-methods
+            """w=0 view of the collection whose inserts never reach the server."""
+
+            def insert_many(self, documents, ordered):  # pylint: disable=unused-argument
+                """Drop the batch."""
+
+        class _Transactions:  # pylint: disable=too-few-public-methods
+            """Transactions collection whose w=0 writes are lost."""
+
+            def with_options(self, **kwargs):  # pylint: disable=unused-argument
+                """Return the lossy w=0 view."""
+                return _LostWrites()
+
+            def __getattr__(self, name):
+                return getattr(transactions, name)
+
+        monkeypatch.setattr(mongo.db, 'transactions', _Transactions())
+        monkeypatch.setattr(transaction_importer, 'UNACKNOWLEDGED_CONFIRM_DELAY', 0)
+        monkeypatch.setitem(client.application.config, 'UNACKNOWLEDGED_IMPORTS', True)
+        monkeypatch.setitem(client.application.config, 'UPLOAD_BATCH_SIZE', 4)
+
+        response = client.post(
+            '/api/upload/csv',
+            data={'file': (io.BytesIO(bank_csv_content), 'bank_transactions.csv')},
+            content_type='multipart/form-data'
+        )
+
+        assert_error_response(response, 500, 'DATABASE_ERROR')
+        upload = db.uploads.find_one()
+        assert upload['status'] == 'failed'
+        assert 'Only 2 of 6' in upload['errors'][-1]
+        # Only the acknowledged last batch was saved, tagged with the upload's date
+        assert transactions.count_documents({'upload_date': upload['upload_date']}) == 2
 
     def test_upload_no_file_provided(self, client):
         """Test upload endpoint with no file."""
         response = client.post('/api/upload/csv')
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'NO_FILE'
+        assert_error_response(response, 400, 'NO_FILE')
 
     def test_upload_empty_filename(self, client):
         """Test upload with empty filename."""
@@ -65,10 +123,7 @@ class TestUploadCSV:
             content_type='multipart/form-data'
         )
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'EMPTY_FILENAME'
+        assert_error_response(response, 400, 'EMPTY_FILENAME')
 
     def test_upload_invalid_file_type(self, client):
         """Test upload with non-CSV/TXT file (e.g., PDF, Excel)."""
@@ -82,15 +137,12 @@ class TestUploadCSV:
             content_type='multipart/form-data'
         )
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_FILE_TYPE'
+        assert_error_response(response, 400, 'INVALID_FILE_TYPE')
 
     def test_upload_invalid_csv_format(self, client, invalid_csv_content):
         """Test upload with invalid CSV format (missing required columns)."""
         data = {
-            'file': (io.BytesIO(invalid_csv_content.encode('utf-8')), 'invalid.csv')
+            'file': (io.BytesIO(invalid_csv_content), 'invalid.csv')
         }
 
         response = client.post(
@@ -99,15 +151,31 @@ class TestUploadCSV:
             content_type='multipart/form-data'
         )
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_CSV'
+        assert_error_response(response, 400, 'INVALID_CSV')
+
+    @pytest.mark.slow
+    def test_upload_parse_error_after_saved_batches(self, client, db, monkeypatch):
+        """Test that a file failing to decode part-way imports nothing."""
+        monkeypatch.setitem(client.application.config, 'UPLOAD_BATCH_SIZE', 1000)
+        # Large enough that earlier batches are saved before the bad byte is decoded
+        content = b'Date,Description,Amount\n' + b''.join(
+            b'2025-11-%02d,SHOP %d,-1.50\n' % (i % 28 + 1, i) for i in range(12000)
+        ) + b'2025-11-01,CAF\xff,-1.00\n'
+
+        response = client.post(
+            '/api/upload/csv',
+            data={'file': (io.BytesIO(content), 'broken.csv')},
+            content_type='multipart/form-data'
+        )
+
+        assert_error_response(response, 400, 'PARSE_ERROR')
+        assert db.transactions.count_documents({}) == 0
+        assert db.uploads.count_documents({}) == 0
 
     def test_validate_csv_valid(self, client, bank_csv_content):
         """Test CSV validation endpoint with valid file."""
         data = {
-            'file': (io.BytesIO(bank_csv_content.encode('utf-8')), 'test.csv')
+            'file': (io.BytesIO(bank_csv_content), 'test.csv')
         }
 
         response = client.post(
@@ -125,7 +193,7 @@ class TestUploadCSV:
     def test_validate_csv_invalid(self, client, invalid_csv_content):
         """Test CSV validation endpoint with invalid file."""
         data = {
-            'file': (io.BytesIO(invalid_csv_content.encode('utf-8')), 'invalid.csv')
+            'file': (io.BytesIO(invalid_csv_content), 'invalid.csv')
         }
 
         response = client.post(
@@ -134,16 +202,13 @@ class TestUploadCSV:
             content_type='multipart/form-data'
         )
 
-        assert response.status_code == 400
-        json_data = response.get_json()
-        assert json_data['success'] is False
-        assert json_data['error']['code'] == 'INVALID_CSV'
+        assert_error_response(response, 400, 'INVALID_CSV')
 
     def test_list_uploads(self, client, bank_csv_content):
         """Test listing upload history."""
         # First upload a file
         data = {
-            'file': (io.BytesIO(bank_csv_content.encode('utf-8')), 'test.csv')
+            'file': (io.BytesIO(bank_csv_content), 'test.csv')
         }
         client.post('/api/upload/csv', data=data, content_type='multipart/form-data')
 
@@ -152,11 +217,65 @@ class TestUploadCSV:
         json_data = assert_single_item_response(response)
         assert json_data['data'][0]['filename'] == 'test.csv'
 
+    def test_list_uploads_before_cursor(self, client, bank_csv_content):
+        """Test paging through upload history with the before cursor."""
+        for filename in ['first.csv', 'second.csv']:
+            data = {
+                'file': (io.BytesIO(bank_csv_content), filename)
+            }
+            client.post('/api/upload/csv', data=data, content_type='multipart/form-data')
+
+        first_page = client.get('/api/uploads?limit=1').get_json()
+        assert first_page['data'][0]['filename'] == 'second.csv'
+        assert first_page['next_before'] is not None
+
+        response = client.get('/api/uploads', query_string={
+            'limit': 1,
+            'before': first_page['next_before'],
+        })
+        assert response.status_code == 200
+        assert response.get_json()['data'][0]['filename'] == 'first.csv'
+
+    def test_list_uploads_before_cursor_breaks_ties(self, client, db):
+        """Test that uploads sharing a timestamp are not skipped across pages."""
+        upload_date = datetime(2025, 11, 1, 12, 0, 0)
+        db.uploads.insert_many([
+            {'filename': f'{i}.csv', 'upload_date': upload_date, 'row_count': 1, 'errors': []}
+            for i in range(3)
+        ])
+
+        filenames = []
+        query_string = {'limit': 1}
+        while True:
+            json_data = client.get('/api/uploads', query_string=query_string).get_json()
+            filenames.extend(upload['filename'] for upload in json_data['data'])
+            if not json_data['next_before']:
+                break
+            query_string = {'limit': 1, 'before': json_data['next_before']}
+
+        assert sorted(filenames) == ['0.csv', '1.csv', '2.csv']
+
+    def test_list_uploads_before_with_offset(self, client):
+        """Test that offset cannot be combined with the before cursor."""
+        response = client.get('/api/uploads', query_string={
+            'offset': 1,
+            'before': '2025-11-01T12:00:00_507f1f77bcf86cd799439011',
+        })
+
+        assert_error_response(response, 400, 'INVALID_PAGINATION')
+
+    def test_list_uploads_invalid_before(self, client):
+        """Test that a malformed before cursor is rejected."""
+        response = client.get('/api/uploads?before=yesterday')
+
+        assert response.status_code == 400
+        assert response.get_json()['error']['code'] == 'INVALID_PAGINATION'
+
     def test_get_upload_details(self, client, db, bank_csv_content):
         """Test getting details of a specific upload."""
         # First upload a file
         data = {
-            'file': (io.BytesIO(bank_csv_content.encode('utf-8')), 'test.csv')
+            'file': (io.BytesIO(bank_csv_content), 'test.csv')
         }
         client.post(
             '/api/upload/csv',
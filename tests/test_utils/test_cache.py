@@ -0,0 +1,44 @@
+"""
+Tests for the in-process TTL cache.
+"""
+import pytest
+
+from utils.cache import TTLCache
+
+
+@pytest.mark.unit
+class TestTTLCache:
+    """Test cache hits, expiry, and invalidation."""
+
+    def test_get_returns_cached_value(self):
+        """Test that a stored value is returned before it expires."""
+        cache = TTLCache(ttl=60)
+        cache.set('all', [1, 2, 3])
+
+        assert cache.get('all') == [1, 2, 3]
+
+    def test_get_missing_returns_default(self):
+        """Test that a miss returns the default value."""
+        cache = TTLCache(ttl=60)
+
+        assert cache.get('all') is None
+        assert cache.get('all', 'fallback') == 'fallback'
+
+    def test_expired_entry_is_dropped(self):
+        """Test that entries are not returned once their TTL has elapsed."""
+        cache = TTLCache(ttl=0)
+        cache.set('all', [1])
+
+        assert cache.get('all') is None
+
+    def test_pop_and_clear_invalidate(self):
+        """Test that pop() and clear() remove entries."""
+        cache = TTLCache(ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        assert cache.pop('a') == 1
+        assert cache.get('a') is None
+
+        cache.clear()
+        assert cache.get('b') is None
@@ -0,0 +1,189 @@
+"""
+Tests for the CSV parser.
+"""
+from datetime import datetime
+
+import pytest
+
+from utils.csv_parser import CSVParser
+
+
+@pytest.mark.unit
+class TestDetectDateFormat:
+    """Test per-row date parsing and format caching."""
+
+    @pytest.mark.parametrize('date_string, expected', [
+        ('2024-12-19', datetime(2024, 12, 19)),
+        (' 12/19/2024 ', datetime(2024, 12, 19)),
+        ('19/12/2024', datetime(2024, 12, 19)),
+        ('Dec 19, 2024', datetime(2024, 12, 19)),
+        ('2024-12-19 10:30', datetime(2024, 12, 19, 10, 30)),  # dateutil fallback
+    ])
+    def test_parses_known_formats(self, date_string, expected):
+        """Test that common bank date formats are parsed."""
+        assert CSVParser.detect_date_format(date_string) == expected
+
+    def test_caches_matched_format(self):
+        """Test that the matched format is remembered and tried first."""
+        format_cache = [None]
+
+        assert CSVParser.detect_date_format('19/12/2024', format_cache) == datetime(2024, 12, 19)
+        assert format_cache == ['%d/%m/%Y']
+        # Ambiguous dates follow the format already seen in the file
+        assert CSVParser.detect_date_format('01/02/2024', format_cache) == datetime(2024, 2, 1)
+
+    def test_year_first_shape_selects_format(self):
+        """Test that a year-first date is parsed with the format its shape implies."""
+        format_cache = [None]
+
+        assert CSVParser.detect_date_format('2024/12/19', format_cache) == datetime(2024, 12, 19)
+        assert format_cache == ['%Y/%m/%d']
+
+    def test_invalid_date_raises(self):
+        """Test that an unparseable date raises ValueError."""
+        with pytest.raises(ValueError):
+            CSVParser.detect_date_format('not a date')
+
+
+@pytest.mark.unit
+class TestParseAmount:
+    """Test amount cleanup and sign handling."""
+
+    @pytest.mark.parametrize('amount_string, expected', [
+        ('$1,234.56', 1234.56),
+        ('(123.45)', -123.45),
+        ('(-123.45)', -123.45),
+        ('-123.45', -123.45),
+        ('$ -1 000.00', -1000.0),
+        (' 5 ', 5.0),
+        ('', 0.0),
+        ('N/A', 0.0),
+        ('NULL', 0.0),
+        (12, 12.0),
+    ])
+    def test_parses_amount(self, amount_string, expected):
+        """Test that bank amount formats are converted to signed floats."""
+        assert CSVParser.parse_amount(amount_string) == expected
+
+    def test_invalid_amount_raises(self):
+        """Test that a non-numeric amount raises ValueError."""
+        with pytest.raises(ValueError, match='Could not parse amount'):
+            CSVParser.parse_amount('abc')
+
+
+@pytest.mark.unit
+class TestDetectColumns:
+    """Test column auto-detection."""
+
+    def test_matches_header_variations(self):
+        """Test that headers are matched case- and whitespace-insensitively."""
+        mapping = CSVParser.detect_columns([' Posted Date', 'PAYEE ', 'Amount', 'Balance'])
+
+        assert mapping['date'] == ' Posted Date'
+        assert mapping['description'] == 'PAYEE '
+        assert mapping['amount'] == 'Amount'
+        assert mapping['amount_columns'] is None
+
+    def test_first_duplicate_header_wins(self):
+        """Test that the first of two equivalent headers is used."""
+        mapping = CSVParser.detect_columns(['Date', 'date ', 'Memo', 'Debit'])
+
+        assert mapping['date'] == 'Date'
+
+    def test_missing_column_raises(self):
+        """Test that a file without an amount column is rejected."""
+        with pytest.raises(ValueError, match='Could not find amount column'):
+            CSVParser.detect_columns(['Date', 'Description'])
+
+
+@pytest.mark.unit
+class TestParseCSV:
+    """Test whole-file parsing."""
+
+    def test_parses_rows_and_reports_errors(self):
+        """Test that valid rows are parsed and invalid ones reported by row number."""
+        content = (
+            'Date,Description,Amount\n'
+            '2024-01-01, COSTCO ,"$1,234.50"\n'
+            '2024-01-03,NETFLIX,(15.99),extra\n'
+            ',,\n'
+            'not a date,SHELL,-45\n'
+            '2024-01-05,STEAM,abc\n'
+        )
+
+        result = CSVParser.parse_csv(content, 'bank.csv')
+
+        assert result['transactions'] == [
+            {'date': datetime(2024, 1, 1), 'description': 'COSTCO', 'amount': 1234.5},
+            {'date': datetime(2024, 1, 3), 'description': 'NETFLIX', 'amount': -15.99},
+        ]
+        assert result['row_count'] == 2
+        assert [error.split(':')[0] for error in result['errors']] == ['Row 5', 'Row 6']
+
+    def test_first_non_empty_amount_column(self):
+        """Test that banks with one column per currency use the filled-in one."""
+        content = (
+            'Transaction Date,Description 1,CAD$,USD$\n'
+            '01/02/2024,AMAZON.COM,,-25.00\n'
+            '01/03/2024,TIM HORTONS,-2.15,\n'
+        )
+
+        result = CSVParser.parse_csv(content)
+
+        assert [txn['amount'] for txn in result['transactions']] == [-25.0, -2.15]
+        assert result['column_mapping']['amount_columns'] == ['CAD$', 'USD$']
+
+    def test_bytes_content_is_decoded(self):
+        """Test that raw UTF-8 bytes parse the same as text."""
+        content = 'Date,Description,Amount\n2024-01-01,CAFÉ DÉPÔT,-4.50\n'
+
+        assert CSVParser.parse_csv(content.encode('utf-8')) == CSVParser.parse_csv(content)
+
+    def test_empty_file_raises(self):
+        """Test that a file without headers is rejected."""
+        with pytest.raises(ValueError, match='empty or has no headers'):
+            CSVParser.parse_csv('')
+
+    def test_iter_yields_batches_with_running_errors(self):
+        """Test that batches number rows across the file and accumulate errors."""
+        content = (
+            'Date,Description,Amount\n'
+            '2024-01-01,COSTCO,-10\n'
+            '2024-01-02,SHELL,abc\n'
+            '2024-01-03,NETFLIX,-15.99\n'
+        )
+
+        batches = [
+            ([txn['description'] for txn in transactions], list(errors))
+            for transactions, errors in CSVParser.parse_csv_iter(content, batch_size=2)
+        ]
+
+        assert batches == [
+            (['COSTCO'], ['Row 3: Could not parse amount: abc']),
+            (['NETFLIX'], ['Row 3: Could not parse amount: abc']),
+        ]
+
+
+@pytest.mark.unit
+class TestValidateCSV:
+    """Test header-only validation."""
+
+    @pytest.mark.parametrize('content', [
+        'Date,Description,Amount\r\n2024-01-01,COSTCO,-10\r\n',
+        '"Date",Description,Amount,"Notes\nspanning two lines"',
+        b'Date,Description,Amount\n2024-01-01,COSTCO,-10\n',
+    ])
+    def test_valid_headers(self, content):
+        """Test that string and bytes content with known columns is valid."""
+        result = CSVParser.validate_csv(content)
+
+        assert result['valid'] is True
+        assert result['headers'][0] == 'Date'
+        assert result['headers'][2] == 'Amount'
+
+    def test_empty_content_is_invalid(self):
+        """Test that empty content is reported as having no headers."""
+        result = CSVParser.validate_csv('')
+
+        assert result['valid'] is False
+        assert 'empty or has no headers' in result['error']
@@ -0,0 +1,46 @@
+"""
+Tests for the Aho-Corasick keyword matcher.
+"""
+import pytest
+
+from utils.keyword_matcher import KeywordMatcher
+
+
+@pytest.mark.unit
+class TestKeywordMatcher:
+    """Test keyword matching and priority ordering."""
+
+    def test_finds_contained_keyword(self):
+        """Test that a keyword anywhere in the text is found."""
+        matcher = KeywordMatcher([('NETFLIX', 1), ('COSTCO', 2)])
+
+        assert matcher.search('CONTACTLESS COSTCO WHOLESALE #123') == 2
+
+    def test_no_match_returns_none(self):
+        """Test that a text containing no keyword returns None."""
+        matcher = KeywordMatcher([('NETFLIX', 1)])
+
+        assert matcher.search('STEAM PURCHASE') is None
+        assert KeywordMatcher([]).search('STEAM PURCHASE') is None
+
+    def test_earlier_keyword_wins(self):
+        """Test that the first keyword in priority order wins, not the first in the text."""
+        matcher = KeywordMatcher([('WHOLESALE', 'first'), ('COSTCO', 'second')])
+
+        assert matcher.search('COSTCO WHOLESALE') == 'first'
+
+    def test_overlapping_keywords(self):
+        """Test that keywords that are suffixes of other partial matches are found."""
+        matcher = KeywordMatcher([('AMAZON PRIME', 1), ('ZON P', 2), ('MAZE', 3)])
+
+        assert matcher.search('AMAZON P') == 2
+        assert matcher.search('AMAZE') == 3
+
+    def test_matches_naive_scan(self):
+        """Test that results agree with a linear substring scan."""
+        keywords = [('AB', 0), ('BAB', 1), ('B', 2), ('ABA', 3), ('CAB', 4)]
+        matcher = KeywordMatcher(keywords)
+
+        for text in ['ABABC', 'CCB', 'CABA', 'BAB', 'C', '']:
+            expected = next((value for keyword, value in keywords if keyword in text), None)
+            assert matcher.search(text) == expected
@@ -0,0 +1,49 @@
+"""
+Tests for the orjson-backed Flask JSON provider.
+"""
+import pytest
+from bson import ObjectId
+from flask import Flask, jsonify, request
+
+from utils.responses import OrjsonProvider
+
+
+@pytest.fixture
+def json_app():
+    """Minimal Flask app using OrjsonProvider that echoes JSON bodies."""
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+
+    @app.post('/echo')
+    def echo():
+        return jsonify(request.get_json())
+
+    return app
+
+
+@pytest.mark.unit
+class TestOrjsonProvider:
+    """Test JSON encoding and decoding through the provider."""
+
+    def test_round_trip(self, json_app):
+        """Test that the test client, request parsing and jsonify agree."""
+        payload = {'name': 'Groceries', 'amount': -145.67, 'ids': [1, 2]}
+
+        response = json_app.test_client().post('/echo', json=payload)
+
+        assert response.status_code == 200
+        assert response.get_json() == payload
+
+    def test_object_id_encoded_as_string(self, json_app):
+        """Test that ObjectId values are encoded like fast_json does."""
+        oid = ObjectId()
+
+        assert json_app.json.dumps({'_id': oid}) == f'{{"_id":"{oid}"}}'
+
+    def test_invalid_body_is_bad_request(self, json_app):
+        """Test that malformed JSON is still rejected with a 400."""
+        response = json_app.test_client().post(
+            '/echo', data=b'{not json', content_type='application/json'
+        )
+
+        assert response.status_code == 400
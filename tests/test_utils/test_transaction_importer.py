@@ -0,0 +1,49 @@
+"""
+Tests for the transaction importer's writer thread.
+"""
+import queue
+import threading
+
+import pytest
+from bson.errors import InvalidDocument
+
+from utils.transaction_importer import INSERT_QUEUE_SIZE, _insert_batches
+
+
+class _FailingCollection:  # pylint: disable=too-few-public-methods
+    """Collection stand-in whose inserts fail like an unencodable document."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def insert_many(self, documents, ordered):  # pylint: disable=unused-argument
+        """Raise a non-PyMongoError, as bson does for invalid documents."""
+        self.calls += 1
+        raise InvalidDocument('cannot encode object')
+
+
+@pytest.mark.unit
+class TestInsertBatches:
+    """Test the writer thread that inserts import batches."""
+
+    def test_failure_drains_queue(self):
+        """Test that after a failed insert the producer can still queue every batch."""
+        collection = _FailingCollection()
+        batches = queue.Queue(maxsize=INSERT_QUEUE_SIZE)
+        failures = []
+        writer = threading.Thread(
+            target=_insert_batches,
+            args=(collection, collection, batches, failures),
+            daemon=True,
+        )
+        writer.start()
+
+        for i in range(INSERT_QUEUE_SIZE * 3):
+            batches.put([{'n': i}], timeout=5)
+        batches.put(None, timeout=5)
+        writer.join(timeout=5)
+
+        assert not writer.is_alive()
+        assert len(failures) == 1
+        assert isinstance(failures[0], InvalidDocument)
+        assert collection.calls == 1
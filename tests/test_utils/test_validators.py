@@ -0,0 +1,84 @@
+"""
+Tests for request validation helpers.
+"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from utils.validators import _validate_date_field, build_transaction_update_doc, parse_object_id
+
+
+@pytest.mark.unit
+class TestParseObjectId:
+    """Test the ObjectId shape pre-check."""
+
+    def test_valid_hex_string(self):
+        """Test that a 24-character hex string becomes an ObjectId."""
+        assert parse_object_id('507f1f77bcf86cd799439011') == ObjectId('507f1f77bcf86cd799439011')
+
+    @pytest.mark.parametrize('value', [
+        'invalid-id',
+        '507f1f77bcf86cd79943901',   # 23 characters
+        '507f1f77bcf86cd79943901z',  # not hex
+        None,
+        42,
+    ])
+    def test_malformed_value_returns_none(self, value):
+        """Test that malformed IDs are rejected without raising."""
+        assert parse_object_id(value) is None
+
+
+@pytest.mark.unit
+class TestValidateDateField:
+    """Test YYYY-MM-DD date parsing for update requests."""
+
+    @pytest.mark.parametrize('date_value, expected', [
+        ('2024-12-19', datetime(2024, 12, 19)),
+        ('2024-1-5', datetime(2024, 1, 5)),
+        (datetime(2024, 12, 19, 8, 30), datetime(2024, 12, 19, 8, 30)),
+    ])
+    def test_parses_date(self, date_value, expected):
+        """Test that ISO dates and datetime objects are accepted."""
+        assert _validate_date_field(date_value) == expected
+
+    @pytest.mark.parametrize('date_value', [
+        '12/19/2024',
+        '2024-13-01',
+        '2024-02-30',
+        '2024-12-19x',
+    ])
+    def test_invalid_date_raises(self, date_value):
+        """Test that other formats and impossible dates raise ValueError."""
+        with pytest.raises(ValueError):
+            _validate_date_field(date_value)
+
+
+@pytest.mark.unit
+class TestBuildTransactionUpdateDoc:
+    """Test coercion of transaction update fields."""
+
+    def test_coerces_fields(self):
+        """Test that each accepted field is coerced and unknown fields are dropped."""
+        update_doc, error = build_transaction_update_doc({
+            'date': '2024-12-19',
+            'amount': '-12.5',
+            'category_id': 4,
+            'description': ' Costco ',
+            'notes': ' weekly ',
+            'auto_categorized': 0,
+            'confidence': 0.75,
+            'source_file': 'ignored.csv',
+        })
+
+        assert error is None
+        assert update_doc == {
+            'date': datetime(2024, 12, 19),
+            'amount': -12.5,
+            '_pending_category_id': 4,
+            'description': 'Costco',
+            'description_upper': 'COSTCO',
+            'notes': 'weekly',
+            'auto_categorized': False,
+            'confidence': 0.75,
+        }
@@ -2,12 +2,72 @@
 Aggregation Utilities
 MongoDB aggregation pipelines for charts and reports.
 """
-from datetime import datetime, timedelta
+import math
+from datetime import datetime, UTC
 from calendar import monthrange
+from functools import lru_cache
+
+from dateutil.relativedelta import relativedelta
+from pymongo import UpdateOne
+
+from utils.cache import category_cache
 
 
 EXCLUDED_CATEGORY_IDS = [1]  # Entry — excluded from all spending charts/budgets
 
+# Category fields used to label chart and budget data
+CATEGORY_FIELDS = {'_id': 0, 'id': 1, 'name': 1, 'color': 1, 'monthly_limit': 1}
+
+# Materialized monthly summaries are rebuilt on read after this many seconds,
+# which bounds staleness from writes made outside the application
+SUMMARY_TTL_SECONDS = 3600
+
+# Index holding every field get_top_merchants reads, so its $match and
+# $group are answered from the index without fetching documents
+TOP_MERCHANTS_INDEX = [('date', 1), ('description', 1), ('category_id', 1), ('amount', 1)]
+
+# Per-category totals; expects a $match that already excludes EXCLUDED_CATEGORY_IDS
+BY_CATEGORY_STAGES = [
+    {
+        '$group': {
+            '_id': '$category_id',
+            'total': {'$sum': '$amount'},
+            'count': {'$sum': 1},
+            'avg': {'$avg': '$amount'}
+        }
+    },
+    # 1 for ascending (most negative first)
+    {'$sort': {'total': 1}},
+]
+
+# Income and expense totals across every category
+SUMMARY_STAGES = [
+    {
+        '$group': {
+            '_id': None,
+            'total_expenses': {
+                '$sum': {'$cond': [{'$lt': ['$amount', 0]}, '$amount', 0]}
+            },
+            'total_income': {
+                '$sum': {'$cond': [{'$gt': ['$amount', 0]}, '$amount', 0]}
+            },
+            'transaction_count': {'$sum': 1},
+            'avg_transaction': {'$avg': '$amount'}
+        }
+    },
+    # Report expenses as a positive amount; net adds the (negative) expenses
+    {
+        '$project': {
+            '_id': 0,
+            'total_expenses': {'$abs': '$total_expenses'},
+            'total_income': 1,
+            'net': {'$add': ['$total_income', '$total_expenses']},
+            'transaction_count': 1,
+            'average_transaction': '$avg_transaction'
+        }
+    }
+]
+
 
 class Aggregations:
     """
@@ -15,10 +75,13 @@ class Aggregations:
     """
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def get_date_range(year: int, month: int = None, quarter: int = None) -> tuple:
         """
         Get start and end dates for a period.
 
+        Results are memoized; the returned tuple of datetimes is immutable.
+
         Args:
             year: Year (int)
             month: Month (1-12) for monthly range
@@ -58,51 +121,277 @@ class Aggregations:
         return start_date, end_date
 
     @staticmethod
-    def aggregate_by_category(mongo, start_date: datetime, end_date: datetime) -> list:
+    def _categories_by_id(mongo) -> dict:
         """
-        Aggregate spending by category for a date range.
+        Get category name, color and monthly limit keyed by category ID.
+
+        The table is cached in category_cache, which category writers clear,
+        so repeated chart and budget requests do not re-read the collection.
 
         Args:
             mongo: Flask-PyMongo instance
+
+        Returns:
+            dict: Category documents (CATEGORY_FIELDS) keyed by ID
+        """
+        categories = category_cache.get('by_id')
+        if categories is None:
+            categories = {
+                cat['id']: cat
+                for cat in mongo.db.categories.find({}, CATEGORY_FIELDS)
+            }
+            category_cache.set('by_id', categories)
+        return categories
+
+    @staticmethod
+    def _whole_months(start_date: datetime, end_date: datetime) -> list | None:
+        """
+        List the calendar months a date range covers, if it covers whole months only.
+
+        Args:
             start_date: Start date (datetime)
             end_date: End date (datetime)
 
         Returns:
-            list: Aggregated data with category, amount, count
+            list: (year, month) tuples, or None if the range does not start on the
+            first of a month at midnight and end on the last day at 23:59:59
+        """
+        _, last_day = monthrange(end_date.year, end_date.month)
+        if (
+            start_date.day != 1
+            or (start_date.hour, start_date.minute, start_date.second) != (0, 0, 0)
+            or end_date.day != last_day
+            or (end_date.hour, end_date.minute, end_date.second) != (23, 59, 59)
+            or start_date > end_date
+        ):
+            return None
+
+        months = []
+        year, month = start_date.year, start_date.month
+        while (year, month) <= (end_date.year, end_date.month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    @staticmethod
+    def _monthly_summaries(mongo, months: list) -> list:
         """
+        Get per-category spending summaries for calendar months.
+
+        Summaries are read from the monthly_summaries collection. Months that
+        are missing (never built, invalidated by a write, or expired) are
+        aggregated from transactions in one pipeline and stored.
+
+        Each month document carries a generation that invalidation
+        increments. A rebuilt month is stored only if its generation is
+        unchanged since it was read, so a rebuild that raced a write cannot
+        put back totals from before the write.
+
+        Args:
+            mongo: Flask-PyMongo instance
+            months: (year, month) tuples
+
+        Returns:
+            list: Summary documents with a 'categories' list of
+            {'category_id', 'total', 'count'}
+        """
+        keys = [f'{year}-{month:02d}' for year, month in months]
+        summaries = {}
+        generations = {}
+        for doc in mongo.db.monthly_summaries.find({'_id': {'$in': keys}}):
+            generations[doc['_id']] = doc.get('generation', 0)
+            # Invalidated months keep a document without categories
+            if 'categories' in doc:
+                summaries[doc['_id']] = doc
+        missing = [ym for ym, key in zip(months, keys) if key not in summaries]
+        if not missing:
+            return list(summaries.values())
+
+        # Create a generation-0 placeholder for months never seen, so an
+        # invalidation during the rebuild has a generation to increment
+        new_keys = [key for key in keys if key not in generations]
+        if new_keys:
+            mongo.db.monthly_summaries.bulk_write(
+                [
+                    UpdateOne({'_id': key}, {'$setOnInsert': {'generation': 0}}, upsert=True)
+                    for key in new_keys
+                ],
+                ordered=False,
+            )
+
+        first_year, first_month = missing[0]
+        last_year, last_month = missing[-1]
         pipeline = [
-            # Filter by date range, exclude system-only categories (e.g. Entry)
             {
                 '$match': {
                     'date': {
-                        '$gte': start_date,
-                        '$lte': end_date
+                        '$gte': datetime(first_year, first_month, 1),
+                        '$lt': (datetime(last_year + 1, 1, 1) if last_month == 12
+                                else datetime(last_year, last_month + 1, 1)),
                     },
                     'category_id': {'$nin': EXCLUDED_CATEGORY_IDS}
                 }
             },
-            # Group by category_id
             {
                 '$group': {
-                    '_id': '$category_id',
+                    '_id': {
+                        'year': {'$year': '$date'},
+                        'month': {'$month': '$date'},
+                        'category_id': '$category_id'
+                    },
                     'total': {'$sum': '$amount'},
-                    'count': {'$sum': 1},
-                    'avg': {'$avg': '$amount'}
+                    'count': {'$sum': 1}
                 }
-            },
-            # Sort by total (descending)
-            {
-                '$sort': {'total': 1}  # 1 for ascending (most negative first)
             }
         ]
 
-        results = list(mongo.db.transactions.aggregate(pipeline))
+        built = {
+            f'{year}-{month:02d}': {
+                '_id': f'{year}-{month:02d}',
+                'year': year,
+                'month': month,
+                'categories': [],
+                'computed_at': datetime.now(UTC),
+            }
+            for year, month in missing
+        }
+        for result in mongo.db.transactions.aggregate(pipeline):
+            key = f"{result['_id']['year']}-{result['_id']['month']:02d}"
+            if key in built:
+                built[key]['categories'].append({
+                    'category_id': result['_id']['category_id'],
+                    'total': result['total'],
+                    'count': result['count']
+                })
+
+        # A generation that moved on means the month was invalidated after it
+        # was read: the filter then matches nothing and the result is not stored
+        mongo.db.monthly_summaries.bulk_write(
+            [
+                UpdateOne(
+                    {'_id': key, 'generation': generations.get(key, 0)},
+                    {'$set': {field: doc[field] for field in doc if field != '_id'}},
+                )
+                for key, doc in built.items()
+            ],
+            ordered=False,
+        )
+        summaries.update(built)
+        return list(summaries.values())
+
+    @staticmethod
+    def invalidate_monthly_summaries(mongo, dates: list | None = None) -> None:
+        """
+        Drop materialized monthly summaries after transactions change.
 
-        # Get category details by ID from categories collection
-        categories = {
-            cat['id']: cat
-            for cat in mongo.db.categories.find()
+        Call after any write that adds, removes, or changes the date, amount,
+        or category of transactions. Dropped months are rebuilt on next read.
+        Their documents are kept with the totals removed and the generation
+        incremented, which stops rebuilds already in flight from storing
+        their results.
+
+        Args:
+            mongo: Flask-PyMongo instance
+            dates: Dates of the affected transactions, or None to drop every month
+        """
+        invalidate = {
+            '$inc': {'generation': 1},
+            '$unset': {'categories': '', 'computed_at': ''},
         }
+        if dates is None:
+            mongo.db.monthly_summaries.update_many({}, invalidate)
+            return
+
+        keys = {f'{d.year}-{d.month:02d}' for d in dates if isinstance(d, datetime)}
+        if keys:
+            mongo.db.monthly_summaries.bulk_write(
+                [UpdateOne({'_id': key}, invalidate, upsert=True) for key in keys],
+                ordered=False,
+            )
+
+    @staticmethod
+    def _aggregate_months_by_category(mongo, months: list) -> list:
+        """
+        Combine monthly summaries into per-category totals.
+
+        Args:
+            mongo: Flask-PyMongo instance
+            months: (year, month) tuples
+
+        Returns:
+            list: Dicts shaped like the aggregate_by_category $group output,
+            sorted by total ascending
+        """
+        totals = {}
+        counts = {}
+        for summary in Aggregations._monthly_summaries(mongo, months):
+            for item in summary['categories']:
+                totals.setdefault(item['category_id'], []).append(item['total'])
+                counts[item['category_id']] = counts.get(item['category_id'], 0) + item['count']
+
+        results = []
+        for category_id, month_totals in totals.items():
+            total = math.fsum(month_totals)
+            results.append({
+                '_id': category_id,
+                'total': total,
+                'count': counts[category_id],
+                'avg': total / counts[category_id]
+            })
+        results.sort(key=lambda result: result['total'])
+        return results
+
+    @staticmethod
+    def aggregate_by_category(mongo, start_date: datetime, end_date: datetime) -> list:
+        """
+        Aggregate spending by category for a date range.
+
+        Ranges made of whole calendar months (as returned by get_date_range)
+        are served from the materialized monthly summaries; other ranges are
+        aggregated from transactions directly.
+
+        Args:
+            mongo: Flask-PyMongo instance
+            start_date: Start date (datetime)
+            end_date: End date (datetime)
+
+        Returns:
+            list: Aggregated data with category, amount, count
+        """
+        if months := Aggregations._whole_months(start_date, end_date):
+            results = Aggregations._aggregate_months_by_category(mongo, months)
+        else:
+            pipeline = [
+                # Filter by date range, exclude system-only categories (e.g. Entry)
+                {
+                    '$match': {
+                        'date': {
+                            '$gte': start_date,
+                            '$lte': end_date
+                        },
+                        'category_id': {'$nin': EXCLUDED_CATEGORY_IDS}
+                    }
+                },
+                *BY_CATEGORY_STAGES,
+            ]
+
+            results = list(mongo.db.transactions.aggregate(pipeline))
+
+        return Aggregations._enhance_category_results(mongo, results)
+
+    @staticmethod
+    def _enhance_category_results(mongo, results: list) -> list:
+        """
+        Label per-category totals with category metadata.
+
+        Args:
+            mongo: Flask-PyMongo instance
+            results: Dicts shaped like the BY_CATEGORY_STAGES output
+
+        Returns:
+            list: Aggregated data with category, amount, count
+        """
+        categories = Aggregations._categories_by_id(mongo)
 
         # Enhance results with category metadata
         enhanced_results = []
@@ -169,7 +458,9 @@ class Aggregations:
         }
 
         budget_status = []
-        for category in mongo.db.categories.find({'id': {'$nin': EXCLUDED_CATEGORY_IDS}}):
+        for category in Aggregations._categories_by_id(mongo).values():
+            if category['id'] in EXCLUDED_CATEGORY_IDS:
+                continue
             monthly_limit = category.get('monthly_limit', 0)
             actual = abs(spending_dict.get(category['id'], 0))
             status, percentage = Aggregations._calculate_status_and_percentage(monthly_limit, actual)
@@ -195,6 +486,9 @@ class Aggregations:
         """
         Get monthly spending trend over time.
 
+        Covers the last `months` calendar months up to the end of `year`, or
+        up to today for the current year.
+
         Args:
             mongo: Flask-PyMongo instance
             year: End year
@@ -205,7 +499,7 @@ class Aggregations:
         """
         # Cap end date at today so future months in the selected year don't produce empty results
         end_date = min(datetime(year, 12, 31, 23, 59, 59), datetime.now())
-        start_date = end_date - timedelta(days=months * 30)
+        start_date = datetime(end_date.year, end_date.month, 1) - relativedelta(months=months - 1)
 
         pipeline = [
             # Filter by date range, exclude system-only categories (e.g. Entry)
@@ -218,47 +512,30 @@ class Aggregations:
                     'category_id': {'$nin': EXCLUDED_CATEGORY_IDS}
                 }
             },
-            # Extract year and month
-            {
-                '$project': {
-                    'year': {'$year': '$date'},
-                    'month': {'$month': '$date'},
-                    'amount': 1
-                }
-            },
-            # Group by year and month
+            # Group by calendar month, keyed by its YYYY-MM label
             {
                 '$group': {
-                    '_id': {
-                        'year': '$year',
-                        'month': '$month'
-                    },
+                    '_id': {'$dateToString': {'format': '%Y-%m', 'date': '$date'}},
                     'total': {'$sum': '$amount'},
                     'count': {'$sum': 1}
                 }
             },
             # Sort by date
             {
-                '$sort': {
-                    '_id.year': 1,
-                    '_id.month': 1
+                '$sort': {'_id': 1}
+            },
+            # Report spending as a positive amount
+            {
+                '$project': {
+                    '_id': 0,
+                    'month': '$_id',
+                    'total': {'$abs': '$total'},
+                    'count': 1
                 }
             }
         ]
 
-        results = list(mongo.db.transactions.aggregate(pipeline))
-
-        # Format results
-        trend_data = []
-        for result in results:
-            year_month = f"{result['_id']['year']}-{result['_id']['month']:02d}"
-            trend_data.append({
-                'month': year_month,
-                'total': abs(result['total']),  # Convert to positive
-                'count': result['count']
-            })
-
-        return trend_data
+        return list(mongo.db.transactions.aggregate(pipeline))
 
     @staticmethod
     def get_top_merchants(mongo, start_date: datetime, end_date: datetime, limit: int = 10) -> list:
@@ -301,30 +578,34 @@ class Aggregations:
             # Limit results
             {
                 '$limit': limit
+            },
+            # Join the category name for the remaining merchants only
+            {
+                '$lookup': {
+                    'from': 'categories',
+                    'localField': 'category_id',
+                    'foreignField': 'id',
+                    'as': 'category'
+                }
+            },
+            {
+                '$project': {
+                    '_id': 0,
+                    'merchant': '$_id',
+                    # Report spending as a positive amount
+                    'total': {'$abs': '$total'},
+                    'count': 1,
+                    'category_id': 1,
+                    'category': {
+                        '$ifNull': [{'$arrayElemAt': ['$category.name', 0]}, 'Unknown']
+                    }
+                }
             }
         ]
 
-        results = list(mongo.db.transactions.aggregate(pipeline))
-
-        # Get category details by ID
-        categories = {
-            cat['id']: cat['name']
-            for cat in mongo.db.categories.find()
-        }
-
-        # Format results
-        merchants = []
-        for result in results:
-            category_id = result['category_id']
-            merchants.append({
-                'merchant': result['_id'],
-                'total': abs(result['total']),  # Convert to positive
-                'count': result['count'],
-                'category_id': category_id,
-                'category': categories.get(category_id, 'Unknown')
-            })
-
-        return merchants
+        # Hinted: the (date, category_id, amount) index matches the same
+        # $match prefix but would need a document fetch per transaction
+        return list(mongo.db.transactions.aggregate(pipeline, hint=TOP_MERCHANTS_INDEX))
 
     @staticmethod
     def get_summary_stats(mongo, start_date: datetime, end_date: datetime) -> dict:
@@ -350,44 +631,24 @@ class Aggregations:
                 }
             },
             # Separate income and expenses
-            {
-                '$group': {
-                    '_id': None,
-                    'total_expenses': {
-                        '$sum': {
-                            '$cond': [
-                                {'$lt': ['$amount', 0]},
-                                '$amount',
-                                0
-                            ]
-                        }
-                    },
-                    'total_income': {
-                        '$sum': {
-                            '$cond': [
-                                {'$gt': ['$amount', 0]},
-                                '$amount',
-                                0
-                            ]
-                        }
-                    },
-                    'transaction_count': {'$sum': 1},
-                    'avg_transaction': {'$avg': '$amount'}
-                }
-            }
+            *SUMMARY_STAGES,
         ]
 
-        results = list(mongo.db.transactions.aggregate(pipeline))
+        return Aggregations._format_summary(list(mongo.db.transactions.aggregate(pipeline)))
 
+    @staticmethod
+    def _format_summary(results: list) -> dict:
+        """
+        Pick the SUMMARY_STAGES result, or zeros when no transactions matched.
+
+        Args:
+            results: Zero or one SUMMARY_STAGES result documents
+
+        Returns:
+            dict: Summary statistics
+        """
         if results:
-            result = results[0]
-            return {
-                'total_expenses': abs(result['total_expenses']),
-                'total_income': result['total_income'],
-                'net': result['total_income'] + result['total_expenses'],  # expenses are negative
-                'transaction_count': result['transaction_count'],
-                'average_transaction': result['avg_transaction']
-            }
+            return results[0]
 
         return {
             'total_expenses': 0,
@@ -396,3 +657,47 @@ class Aggregations:
             'transaction_count': 0,
             'average_transaction': 0
         }
+
+    @staticmethod
+    def dashboard(mongo, start_date: datetime, end_date: datetime) -> tuple:
+        """
+        Get summary statistics and per-category spending for a date range.
+
+        Equivalent to get_summary_stats followed by aggregate_by_category.
+        Whole-month ranges read the categories from the monthly summaries, so
+        only the summary scans transactions. Other ranges compute both in one
+        $facet pipeline, scanning the matching transactions once.
+
+        Args:
+            mongo: Flask-PyMongo instance
+            start_date: Start date (datetime)
+            end_date: End date (datetime)
+
+        Returns:
+            tuple: (summary statistics dict, aggregated category list)
+        """
+        if Aggregations._whole_months(start_date, end_date):
+            return (
+                Aggregations.get_summary_stats(mongo, start_date, end_date),
+                Aggregations.aggregate_by_category(mongo, start_date, end_date),
+            )
+
+        pipeline = [
+            {'$match': {'date': {'$gte': start_date, '$lte': end_date}}},
+            {
+                '$facet': {
+                    'summary': SUMMARY_STAGES,
+                    'by_category': [
+                        # Exclude system-only categories (e.g. Entry)
+                        {'$match': {'category_id': {'$nin': EXCLUDED_CATEGORY_IDS}}},
+                        *BY_CATEGORY_STAGES,
+                    ],
+                }
+            },
+        ]
+        result = next(mongo.db.transactions.aggregate(pipeline))
+
+        return (
+            Aggregations._format_summary(result['summary']),
+            Aggregations._enhance_category_results(mongo, result['by_category']),
+        )
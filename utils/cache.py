@@ -0,0 +1,87 @@
+"""
+Cache utilities.
+Small in-process caches for read-mostly lookups.
+"""
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Thread-safe key/value cache whose entries expire after a fixed time-to-live.
+
+    Intended for small, rarely-changing data (e.g. the category list) where a
+    few seconds of staleness across worker processes is acceptable. Writers
+    must call pop() or clear() after changing the underlying data.
+    """
+
+    def __init__(self, ttl: float):
+        """
+        Initialize an empty cache.
+
+        Args:
+            ttl: Entry lifetime in seconds
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for key, or default if missing or expired.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            The cached value or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key, value) -> None:
+        """
+        Store a value for key, resetting its time-to-live.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key, default=None):
+        """
+        Remove key from the cache.
+
+        Args:
+            key: Cache key
+            default: Value returned if key is not cached
+
+        Returns:
+            The removed value or default
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Category list and lookup tables shared by the API, web blueprints and
+# aggregations; category writers clear() it
+category_cache = TTLCache(ttl=30)
+
+# Shared AutoCategorizer whose compiled rule matchers are reused across uploads
+categorizer_cache = TTLCache(ttl=60)
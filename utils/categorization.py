@@ -3,8 +3,45 @@ Auto-Categorization Utility
 Smart categorization system that learns merchant patterns.
 """
 import re
+import threading
+from collections import Counter
 from datetime import datetime, UTC
-from fuzzywuzzy import fuzz
+from pymongo import UpdateOne
+from rapidfuzz import fuzz, process
+
+from utils.aggregations import Aggregations
+from utils.cache import categorizer_cache
+from utils.keyword_matcher import KeywordMatcher
+
+# Minimum RapidFuzz ratio for a fuzzy rule to match
+FUZZY_SCORE_CUTOFF = 80
+
+# Merchant pattern clean-up steps used by _extract_merchant_pattern
+_LEADING_CODE_RE = re.compile(r'^\d{3,6}\s+')
+_STORE_NUMBER_RE = re.compile(r'#\d*')
+_DATE_RE = re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}')
+_TRAILING_REFERENCE_RE = re.compile(r'\s+(?:[A-Z]+\d[A-Z0-9]*|\d+[A-Z][A-Z0-9]*)\s*$')
+_TRAILING_NUMBER_RE = re.compile(r'\s+\d+\s*$')
+
+
+def get_categorizer(mongo) -> 'AutoCategorizer':
+    """
+    Return the shared AutoCategorizer, creating it on a cache miss.
+
+    The instance keeps its compiled rule matchers between requests until
+    the cache entry expires or a rule is learned.
+
+    Args:
+        mongo: Flask-PyMongo instance
+
+    Returns:
+        AutoCategorizer: Shared categorizer
+    """
+    categorizer = categorizer_cache.get('default')
+    if categorizer is None:
+        categorizer = AutoCategorizer(mongo)
+        categorizer_cache.set('default', categorizer)
+    return categorizer
 
 
 class AutoCategorizer:
@@ -26,6 +63,7 @@ class AutoCategorizer:
         r'POINT OF SALE\s*-?\s*',
         r'ATM\s+(?:WITHDRAWAL|DEPOSIT)\s*-?\s*',
     ]
+    _PREFIX_RES = [re.compile(f'^{prefix}', re.IGNORECASE) for prefix in GENERIC_PREFIXES]
 
     def __init__(self, mongo):
         """
@@ -35,6 +73,14 @@ class AutoCategorizer:
             mongo: Flask-PyMongo instance
         """
         self.mongo = mongo
+        # Rule lookup structures, built on first use by _load_rules()
+        self._exact_rules = None
+        self._contains_matcher = None
+        self._fuzzy_patterns = None
+        self._fuzzy_rules = None
+        # Rule matches not yet written to the database, by rule _id
+        self._pending_usage = Counter()
+        self._usage_lock = threading.Lock()
 
     ENTRY_CATEGORY_ID = 1   # Money coming in (default)
     SAVINGS_CATEGORY_ID = 16  # Savings account deposits
@@ -56,6 +102,9 @@ class AutoCategorizer:
         """
         description_clean = description.strip().upper()
 
+        if self._exact_rules is None:
+            self._load_rules()
+
         if result := self._exact_match(description_clean):
             return result
 
@@ -65,6 +114,68 @@ class AutoCategorizer:
         if result := self._fuzzy_match(description_clean):
             return result
 
+        return self._unmatched_result(amount, account_type)
+
+    def categorize_batch(self, descriptions, amounts, account_type=None):
+        """
+        Auto-categorize many transactions at once.
+
+        Gives the same results as calling categorize() for each transaction.
+        Fuzzy matching runs as a single RapidFuzz cdist over every
+        transaction left unmatched by the exact and contains rules, instead
+        of one scan per transaction.
+
+        Args:
+            descriptions: Transaction descriptions
+            amounts: Transaction amounts, parallel to descriptions
+            account_type: Account type (e.g. 'savings') shared by all transactions
+
+        Returns:
+            list: categorize() result dicts, in input order
+        """
+        if self._exact_rules is None:
+            self._load_rules()
+
+        cleaned = [description.strip().upper() for description in descriptions]
+        results = [None] * len(cleaned)
+        unmatched = []
+        for index, description in enumerate(cleaned):
+            if result := self._exact_match(description) or self._contains_match(description):
+                results[index] = result
+            else:
+                unmatched.append(index)
+
+        if unmatched and self._fuzzy_patterns:
+            # Scores below the cutoff are 0; argmax keeps the first best rule like extractOne
+            scores = process.cdist(
+                [cleaned[index] for index in unmatched],
+                self._fuzzy_patterns,
+                scorer=fuzz.ratio,
+                score_cutoff=FUZZY_SCORE_CUTOFF,
+                dtype=float,
+                workers=-1,
+            )
+            for index, row, rule_index in zip(unmatched, scores, scores.argmax(axis=1)):
+                if score := row[rule_index]:
+                    results[index] = self._fuzzy_result(rule_index, float(score))
+
+        for index in unmatched:
+            if results[index] is None:
+                results[index] = self._unmatched_result(amounts[index], account_type)
+
+        return results
+
+    def _unmatched_result(self, amount, account_type):
+        """
+        Categorize a transaction that matched no rule, by the sign of its amount.
+
+        Args:
+            amount: Transaction amount, or None
+            account_type: Account type (e.g. 'savings')
+
+        Returns:
+            dict: Match result with match_type 'amount' or 'none'
+        """
         # Positive amount with no rule match → Entry or Savings
         if amount is not None and amount > 0:
             cat_id = self.SAVINGS_CATEGORY_ID if account_type == 'savings' else self.ENTRY_CATEGORY_ID
@@ -91,9 +202,7 @@ class AutoCategorizer:
         Returns:
             dict or None: Match result if found
         """
-        if rule := self.mongo.db.categorization_rules.find_one(
-            {'pattern': description, 'match_type': 'exact'}
-        ):
+        if rule := self._exact_rules.get(description):
             # Update rule usage
             self._update_rule_usage(rule['_id'])
 
@@ -105,6 +214,37 @@ class AutoCategorizer:
 
         return None
 
+    def _load_rules(self):
+        """
+        Load the exact, contains and fuzzy rules with one query.
+
+        Rules are read in use_count order, so frequently used rules win
+        duplicate exact patterns, overlapping contains patterns and fuzzy
+        ties. Builds an exact pattern lookup table, a contains keyword
+        matcher and the upper-cased fuzzy patterns with their rules.
+        """
+        exact_rules = {}
+        contains_rules = []
+        fuzzy_patterns = []
+        fuzzy_rules = []
+        for rule in self.mongo.db.categorization_rules.find(
+            {'match_type': {'$in': ['exact', 'contains', 'fuzzy']}},
+            {'pattern': 1, 'category_id': 1, 'match_type': 1},
+        ).sort('use_count', -1):
+            match_type = rule['match_type']
+            if match_type == 'exact':
+                exact_rules.setdefault(rule['pattern'], rule)
+            elif match_type == 'contains':
+                contains_rules.append((rule['pattern'].upper(), rule))
+            else:
+                fuzzy_patterns.append(rule['pattern'].upper())
+                fuzzy_rules.append(rule)
+
+        self._exact_rules = exact_rules
+        self._contains_matcher = KeywordMatcher(contains_rules)
+        self._fuzzy_patterns = fuzzy_patterns
+        self._fuzzy_rules = fuzzy_rules
+
     def _contains_match(self, description):
         """
         Try pattern matching using 'contains' rules.
@@ -115,22 +255,15 @@ class AutoCategorizer:
         Returns:
             dict or None: Match result if found
         """
-        # Get all 'contains' rules
-        rules = self.mongo.db.categorization_rules.find({
-            'match_type': 'contains'
-        }).sort('use_count', -1)  # Prioritize frequently used rules
-
-        for rule in rules:
-            pattern = rule['pattern'].upper()
-            if pattern in description:
-                # Update rule usage
-                self._update_rule_usage(rule['_id'])
-
-                return {
-                    'category_id': rule['category_id'],
-                    'confidence': 0.9,
-                    'match_type': 'contains'
-                }
+        if rule := self._contains_matcher.search(description):
+            # Update rule usage
+            self._update_rule_usage(rule['_id'])
+
+            return {
+                'category_id': rule['category_id'],
+                'confidence': 0.9,
+                'match_type': 'contains'
+            }
 
         return None
 
@@ -144,53 +277,76 @@ class AutoCategorizer:
         Returns:
             dict or None: Match result if found
         """
-        # Get all fuzzy rules
-        rules = self.mongo.db.categorization_rules.find({
-            'match_type': 'fuzzy'
-        })
-
-        best_match = None
-        best_score = 0
-        best_rule = None
-
-        for rule in rules:
-            pattern = rule['pattern'].upper()
-            score = fuzz.ratio(pattern, description)
+        # Only accept fuzzy matches with score >= FUZZY_SCORE_CUTOFF. RapidFuzz
+        # rejects patterns whose length alone rules out the cutoff before scoring.
+        match = process.extractOne(
+            description, self._fuzzy_patterns, scorer=fuzz.ratio, score_cutoff=FUZZY_SCORE_CUTOFF
+        )
+        if match is None:
+            return None
 
-            if score > best_score:
-                best_score = score
-                best_match = rule['category_id']
-                best_rule = rule
+        _, score, index = match
+        return self._fuzzy_result(index, score)
 
-        # Only accept fuzzy matches with score >= 80
-        if best_score >= 80:
-            # Update rule usage
-            self._update_rule_usage(best_rule['_id'])
+    def _fuzzy_result(self, index, score):
+        """
+        Build the match result for a fuzzy rule and record its usage.
 
-            confidence = best_score / 100.0
+        Args:
+            index: Position of the rule in the fuzzy rule list
+            score: RapidFuzz ratio (0-100)
 
-            return {
-                'category_id': best_match,
-                'confidence': confidence,
-                'match_type': 'fuzzy'
-            }
+        Returns:
+            dict: Match result
+        """
+        rule = self._fuzzy_rules[index]
+        # Update rule usage
+        self._update_rule_usage(rule['_id'])
 
-        return None
+        return {
+            'category_id': rule['category_id'],
+            'confidence': score / 100.0,
+            'match_type': 'fuzzy'
+        }
 
     def _update_rule_usage(self, rule_id):
         """
-        Update rule usage statistics.
+        Record a rule match. Counts are written by flush_rule_usage().
 
         Args:
             rule_id: Rule ObjectId
         """
-        self.mongo.db.categorization_rules.update_one(
-            {'_id': rule_id},
-            {
-                '$set': {'last_used': datetime.now(UTC)},
-                '$inc': {'use_count': 1}
-            }
+        with self._usage_lock:
+            self._pending_usage[rule_id] += 1
+
+    def flush_rule_usage(self, now=None):
+        """
+        Write recorded rule usage statistics in one bulk_write.
+
+        Args:
+            now: Timestamp stored as last_used on every rule (default now);
+                pass the import timestamp to reuse one clock read per upload
+
+        Returns:
+            int: Number of rules updated
+        """
+        with self._usage_lock:
+            pending, self._pending_usage = self._pending_usage, Counter()
+        if not pending:
+            return 0
+
+        now = now or datetime.now(UTC)
+        self.mongo.db.categorization_rules.bulk_write(
+            [
+                UpdateOne(
+                    {'_id': rule_id},
+                    {'$set': {'last_used': now}, '$inc': {'use_count': count}},
+                )
+                for rule_id, count in pending.items()
+            ],
+            ordered=False,
         )
+        return len(pending)
 
     def learn_from_categorization(self, description, category_id):
         """
@@ -208,6 +364,13 @@ class AutoCategorizer:
         # Extract merchant name (remove numbers, locations, etc.)
         merchant_pattern = self._extract_merchant_pattern(description_clean)
 
+        # Reload the rule tables on next use so they see this rule
+        self._exact_rules = None
+        self._contains_matcher = None
+        self._fuzzy_patterns = None
+        self._fuzzy_rules = None
+        categorizer_cache.clear()
+
         if existing_rule := self.mongo.db.categorization_rules.find_one(
             {'pattern': merchant_pattern, 'match_type': 'contains'}
         ):
@@ -275,21 +438,15 @@ class AutoCategorizer:
             # No prefix — merchant starts the description, match anywhere
             batch_regex = re.escape(merchant_pattern)
 
-        # Find all uncategorized transactions (category_id=0) that match the pattern
-        uncategorized = self.mongo.db.transactions.find({
-            'category_id': 0,
-            'description': {'$regex': batch_regex, '$options': 'i'}
-        })
-
-        # Count and collect IDs
-        transaction_ids = [txn['_id'] for txn in uncategorized]
-
-        if not transaction_ids:
-            return 0
-
-        # Bulk update all matching transactions
+        # Update all uncategorized transactions (category_id=0) matching the
+        # pattern in one server-side pass. The regex is case-sensitive against
+        # the upper-cased copy so it is evaluated on the (category_id,
+        # description_upper) index keys, and an anchored one seeks its prefix.
         result = self.mongo.db.transactions.update_many(
-            {'_id': {'$in': transaction_ids}},
+            {
+                'category_id': 0,
+                'description_upper': {'$regex': batch_regex}
+            },
             {
                 '$set': {
                     'category_id': category_id,
@@ -298,6 +455,8 @@ class AutoCategorizer:
                 }
             }
         )
+        if result.modified_count:
+            Aggregations.invalidate_monthly_summaries(self.mongo)
 
         return result.modified_count
 
@@ -315,27 +474,27 @@ class AutoCategorizer:
         # Strip known generic bank prefixes (e.g. "CONTACTLESS INTERAC PURCHASE - ")
         # so the first words are the actual merchant, not the bank transaction type.
         pattern = description
-        for prefix in self.GENERIC_PREFIXES:
-            stripped = re.sub(f'^{prefix}', '', pattern, flags=re.IGNORECASE).strip()
+        for prefix_re in self._PREFIX_RES:
+            stripped = prefix_re.sub('', pattern).strip()
             if stripped != pattern:
                 pattern = stripped
                 break
 
         # Remove leading transaction codes (e.g. "2024", "8276", "6736")
         # — standalone 3-6 digit numbers that appear before the merchant name
-        pattern = re.sub(r'^\d{3,6}\s+', '', pattern)
+        pattern = _LEADING_CODE_RE.sub('', pattern)
 
         # Remove store/terminal numbers (#123, #456; also trailing bare #)
-        pattern = re.sub(r'#\d*', '', pattern)
+        pattern = _STORE_NUMBER_RE.sub('', pattern)
 
         # Remove dates in various formats
-        pattern = re.sub(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', '', pattern)
+        pattern = _DATE_RE.sub('', pattern)
 
         # Remove trailing bank reference codes (mixed letters+digits, e.g. WWM4AK, RMEEU7, 82ZAEA)
-        pattern = re.sub(r'\s+(?:[A-Z]+\d[A-Z0-9]*|\d+[A-Z][A-Z0-9]*)\s*$', '', pattern)
+        pattern = _TRAILING_REFERENCE_RE.sub('', pattern)
 
         # Remove standalone trailing numbers
-        pattern = re.sub(r'\s+\d+\s*$', '', pattern)
+        pattern = _TRAILING_NUMBER_RE.sub('', pattern)
 
         # Remove extra whitespace and punctuation left at boundaries
         pattern = pattern.strip(' -/')
@@ -361,32 +520,31 @@ class AutoCategorizer:
         Returns:
             dict: Statistics
         """
-        total_rules = self.mongo.db.categorization_rules.count_documents({})
-
-        rules_by_type = {}
-        for match_type in ['exact', 'contains', 'fuzzy', 'regex']:
-            count = self.mongo.db.categorization_rules.count_documents({
-                'match_type': match_type
-            })
-            rules_by_type[match_type] = count
-
-        # Most used rules
-        most_used = list(
-            self.mongo.db.categorization_rules
-            .find()
-            .sort('use_count', -1)
-            .limit(10)
-        )
+        # One round-trip: counts per match type plus the most used rules
+        stats = next(self.mongo.db.categorization_rules.aggregate([
+            {
+                '$facet': {
+                    'by_type': [
+                        {'$group': {'_id': '$match_type', 'count': {'$sum': 1}}}
+                    ],
+                    'most_used': [
+                        {'$sort': {'use_count': -1}},
+                        {'$limit': 10},
+                        {'$project': {'_id': 0, 'pattern': 1, 'category_id': 1, 'use_count': 1}}
+                    ],
+                }
+            }
+        ]))
+
+        type_counts = {group['_id']: group['count'] for group in stats['by_type']}
+        total_rules = sum(type_counts.values())
+        rules_by_type = {
+            match_type: type_counts.get(match_type, 0)
+            for match_type in ['exact', 'contains', 'fuzzy', 'regex']
+        }
 
         return {
             'total_rules': total_rules,
             'rules_by_type': rules_by_type,
-            'most_used_rules': [
-                {
-                    'pattern': rule['pattern'],
-                    'category_id': rule['category_id'],
-                    'use_count': rule['use_count']
-                }
-                for rule in most_used
-            ]
+            'most_used_rules': stats['most_used']
         }
@@ -5,9 +5,17 @@ Flexible CSV parsing with auto-format detection.
 import csv
 import io
 from datetime import datetime
+
+import pandas as pd
 from dateutil import parser as date_parser
 
-ALLOWED_UPLOAD_EXTENSIONS = {'csv', 'txt'}
+ALLOWED_UPLOAD_EXTENSIONS = ('.csv', '.txt')
+# CSV rows parsed per batch by CSVParser.parse_csv_iter()
+PARSE_BATCH_SIZE = 1000
+# Formats of 10-character year-first dates, keyed by the separator after the year
+_YEAR_FIRST_FORMATS = {'-': '%Y-%m-%d', '/': '%Y/%m/%d'}
+# Amount cells that mean "no amount" (compared lower-cased)
+_NULL_AMOUNTS = frozenset({'null', 'none', 'n/a'})
 
 
 def allowed_file(filename: str) -> bool:
@@ -18,12 +26,22 @@ def allowed_file(filename: str) -> bool:
         filename: The filename to check.
 
     Returns:
-        True if the extension is in ALLOWED_UPLOAD_EXTENSIONS, False otherwise.
+        True if the filename ends with one of ALLOWED_UPLOAD_EXTENSIONS, False otherwise.
     """
-    return (
-        '.' in filename
-        and filename.rsplit('.', 1)[1].lower() in ALLOWED_UPLOAD_EXTENSIONS
-    )
+    return filename.lower().endswith(ALLOWED_UPLOAD_EXTENSIONS)
+
+
+def open_upload(file) -> io.TextIOWrapper:
+    """
+    Wrap an uploaded file in a UTF-8 text stream without reading it into memory.
+
+    Args:
+        file: Werkzeug FileStorage from request.files
+
+    Returns:
+        Text stream over the upload, decoded lazily as the CSV reader consumes it
+    """
+    return io.TextIOWrapper(file.stream, encoding='utf-8', newline='')
 
 
 class CSVParser:
@@ -32,7 +50,7 @@ class CSVParser:
     """
 
     # Common date format patterns
-    DATE_FORMATS = [
+    DATE_FORMATS = (
         '%Y-%m-%d',      # 2024-12-19
         '%m/%d/%Y',      # 12/19/2024
         '%d/%m/%Y',      # 19/12/2024
@@ -43,17 +61,17 @@ class CSVParser:
         '%B %d, %Y',     # December 19, 2024
         '%d %b %Y',      # 19 Dec 2024
         '%d %B %Y',      # 19 December 2024
-    ]
+    )
 
     # Common column name variations
-    DATE_COLUMNS = [
+    DATE_COLUMNS = (
         'date',
         'transaction date',
         'trans date',
         'posted date',
         'posting date'
-    ]
-    DESCRIPTION_COLUMNS = [
+    )
+    DESCRIPTION_COLUMNS = (
         'description',
         'merchant',
         'memo',
@@ -61,8 +79,8 @@ class CSVParser:
         'payee',
         'details',
         'description 1'
-    ]
-    AMOUNT_COLUMNS = [
+    )
+    AMOUNT_COLUMNS = (
         'amount',
         'debit',
         'credit',
@@ -70,15 +88,21 @@ class CSVParser:
         'value',
         'cad$',
         'usd$'
-    ]
+    )
 
     @staticmethod
-    def detect_date_format(date_string):
+    def detect_date_format(date_string, format_cache=None):
         """
         Detect the date format by trying common patterns.
 
+        The DATE_FORMATS are tried with strptime first; dateutil, which is
+        much slower, is only the last resort (e.g. for dates without a year).
+
         Args:
             date_string: Date string to parse
+            format_cache: Optional one-item list holding the format that last
+                matched. It is tried first and updated on a new match, so a
+                file in a single format needs one strptime call per row.
 
         Returns:
             datetime object
@@ -86,39 +110,104 @@ class CSVParser:
         Raises:
             ValueError: If date cannot be parsed
         """
-        # Try dateutil parser first (handles most formats)
-        try:
-            return date_parser.parse(date_string, fuzzy=False)
-        except (ValueError, TypeError, OverflowError):
-            pass
+        if format_cache is None:
+            format_cache = [None]
+        stripped = date_string.strip() if isinstance(date_string, str) else date_string
+
+        # A year-first date has only one candidate format, picked from its
+        # shape, and is built from its digits without going through strptime
+        if (isinstance(stripped, str) and len(stripped) == 10
+                and (sniffed := _YEAR_FIRST_FORMATS.get(stripped[4]))
+                and stripped[7] == stripped[4]
+                and stripped[:4].isdigit() and stripped[5:7].isdigit() and stripped[8:].isdigit()):
+            try:
+                parsed = datetime(int(stripped[:4]), int(stripped[5:7]), int(stripped[8:]))
+            except ValueError:
+                pass
+            else:
+                format_cache[0] = sniffed
+                return parsed
+
+        if cached_format := format_cache[0]:
+            try:
+                return datetime.strptime(stripped, cached_format)
+            except (ValueError, TypeError):
+                pass
 
-        # Try specific formats
         for fmt in CSVParser.DATE_FORMATS:
+            if fmt == cached_format:
+                continue
             try:
-                return datetime.strptime(date_string.strip(), fmt)
-            except ValueError:
+                parsed = datetime.strptime(stripped, fmt)
+            except (ValueError, TypeError):
                 continue
+            format_cache[0] = fmt
+            return parsed
+
+        # Fall back to dateutil for anything the known formats miss
+        try:
+            return date_parser.parse(date_string, fuzzy=False)
+        except (ValueError, TypeError, OverflowError):
+            pass
 
         raise ValueError(f"Could not parse date: {date_string}")
 
     @staticmethod
-    def find_column(headers, possible_names):
+    def parse_dates(date_strings):
         """
-        Find a column by checking possible name variations.
+        Parse many date strings in one vectorized pandas pass.
+
+        Strings without a four-digit year are left to detect_date_format(),
+        which fills in the current year the way dateutil does.
+
+        Args:
+            date_strings: List of date strings
+
+        Returns:
+            list: datetime for each string, or None where the vectorized
+            parse failed and the caller should fall back to detect_date_format()
+        """
+        series = pd.Series(date_strings, dtype=object)
+        has_year = series.str.contains(r'\d{4}', na=False)
+        try:
+            parsed = pd.to_datetime(series.where(has_year), format='mixed', errors='coerce')
+        except (ValueError, TypeError, OverflowError):
+            # e.g. mixed timezone offsets - parse every row individually
+            return [None] * len(date_strings)
+        # DatetimeArray.to_pydatetime() returns an object ndarray on every
+        # pandas version (Series.dt.to_pydatetime() became a Series in pandas 3)
+        values = parsed.array.to_pydatetime()
+        values[parsed.isna().to_numpy()] = None
+        return values.tolist()
+
+    @staticmethod
+    def normalize_headers(headers):
+        """
+        Map lower-cased, stripped header names to the original headers.
 
         Args:
             headers: List of column headers
-            possible_names: List of possible column names
 
         Returns:
-            Column name if found, None otherwise
+            dict: Normalized name to header; the first of any duplicates wins
         """
-        headers_lower = [h.lower().strip() for h in headers]
+        return {header.lower().strip(): header for header in reversed(headers)}
 
+    @staticmethod
+    def find_column(normalized_headers, possible_names):
+        """
+        Find a column by checking possible name variations.
+
+        Args:
+            normalized_headers: Mapping returned by normalize_headers()
+            possible_names: Possible column names, in order of preference
+
+        Returns:
+            Column name if found, None otherwise
+        """
         for possible_name in possible_names:
-            if possible_name in headers_lower:
-                idx = headers_lower.index(possible_name)
-                return headers[idx]
+            if possible_name in normalized_headers:
+                return normalized_headers[possible_name]
 
         return None
 
@@ -140,26 +229,20 @@ class CSVParser:
         # Convert to string and clean up
         amount_str = str(amount_string).strip()
 
-        # Handle empty or null values
-        if not amount_str or amount_str.lower() in ['', 'null', 'none', 'n/a']:
+        # Handle empty or null values (only short strings can be a null marker)
+        if not amount_str or (len(amount_str) <= 4 and amount_str.lower() in _NULL_AMOUNTS):
             return 0.0
 
         # Check if wrapped in parentheses (accounting format for negative)
-        is_negative = False
-        if amount_str.startswith('(') and amount_str.endswith(')'):
-            is_negative = True
+        is_negative = amount_str[0] == '(' and amount_str[-1] == ')'
+        if is_negative:
             amount_str = amount_str[1:-1]
 
-        # Remove currency symbols and commas
-        amount_str = amount_str.replace('$', '').replace(',', '').replace(' ', '')
-
-        # Handle negative sign
-        if amount_str.startswith('-'):
-            is_negative = True
-            amount_str = amount_str[1:]
-
+        # Remove currency symbols and commas. Chained str.replace calls beat a
+        # character-class regex or str.translate on these short strings.
+        # float() reads a leading minus sign itself, so it is not sliced off.
         try:
-            amount = float(amount_str)
+            amount = float(amount_str.replace('$', '').replace(',', '').replace(' ', ''))
             return -abs(amount) if is_negative else amount
         except ValueError as e:
             raise ValueError(f"Could not parse amount: {amount_string}") from e
@@ -179,26 +262,26 @@ class CSVParser:
             ValueError: If required columns cannot be detected
         """
         mapping = {}
+        normalized_headers = CSVParser.normalize_headers(headers)
 
         # Find date column
-        date_col = CSVParser.find_column(headers, CSVParser.DATE_COLUMNS)
+        date_col = CSVParser.find_column(normalized_headers, CSVParser.DATE_COLUMNS)
         if not date_col:
             raise ValueError(f"Could not find date column. Available columns: {headers}")
         mapping['date'] = date_col
 
         # Find description column
-        desc_col = CSVParser.find_column(headers, CSVParser.DESCRIPTION_COLUMNS)
+        desc_col = CSVParser.find_column(normalized_headers, CSVParser.DESCRIPTION_COLUMNS)
         if not desc_col:
             raise ValueError(f"Could not find description column. Available columns: {headers}")
         mapping['description'] = desc_col
 
         # Find amount column(s) - some banks have multiple currency columns (CAD$, USD$)
-        headers_lower = [h.lower().strip() for h in headers]
-        amount_cols = []
-        for possible_name in CSVParser.AMOUNT_COLUMNS:
-            if possible_name in headers_lower:
-                idx = headers_lower.index(possible_name)
-                amount_cols.append(headers[idx])
+        amount_cols = [
+            normalized_headers[possible_name]
+            for possible_name in CSVParser.AMOUNT_COLUMNS
+            if possible_name in normalized_headers
+        ]
 
         if not amount_cols:
             raise ValueError(f"Could not find amount column. Available columns: {headers}")
@@ -210,55 +293,179 @@ class CSVParser:
         return mapping
 
     @staticmethod
-    def _parse_row(row, column_mapping):
+    def _text_stream(file_content):
+        """
+        Return a text stream over CSV content.
+
+        Strings and bytes are wrapped in memory; bytes are decoded as UTF-8
+        chunk by chunk while the reader consumes them, rather than copied into
+        one decoded string. Text streams are rewound so validate_csv() and
+        parse_csv() can read the same upload in turn.
+
+        Args:
+            file_content: File content (string, bytes, or text stream)
+
+        Returns:
+            Text stream positioned at the start of the content
+        """
+        if isinstance(file_content, bytes):
+            return io.TextIOWrapper(io.BytesIO(file_content), encoding='utf-8', newline='')
+        if isinstance(file_content, str):
+            return io.StringIO(file_content)
+        file_content.seek(0)
+        return file_content
+
+    @staticmethod
+    def _iter_lines(text):
+        """
+        Yield the lines of a string one at a time, keeping their line endings.
+
+        Unlike io.StringIO or str.splitlines(), nothing past the lines actually
+        consumed is copied.
+
+        Args:
+            text: CSV content as a string
+
+        Yields:
+            str: Each line of text
+        """
+        start = 0
+        length = len(text)
+        while start < length:
+            end = text.find('\n', start) + 1 or length
+            yield text[start:end]
+            start = end
+
+    @staticmethod
+    def _read_columns(file_content):
         """
-        Parse a single CSV row into a transaction dict.
+        Read the header row of CSV content and detect its columns.
 
         Args:
-            row: CSV row dict
-            column_mapping: Column name mapping
+            file_content: File content (string, bytes, or text stream)
 
         Returns:
-            dict: Transaction data or None if row is empty
+            tuple: (stream, column_mapping) with the text stream rewound to the start
 
         Raises:
-            ValueError: If row data is invalid
+            ValueError: If the file has no headers or required columns are missing
         """
-        date_str = row[column_mapping['date']]
-        description = row[column_mapping['description']]
-
-        # Handle multiple amount columns (e.g., CAD$, USD$ in Canadian banks)
-        if column_mapping.get('amount_columns'):
-            # Find first non-empty amount from multiple columns
-            amount_str = None
-            for col in column_mapping['amount_columns']:
-                value = row.get(col, '').strip()
-                if value:
-                    amount_str = value
-                    break
-            if not amount_str:
-                amount_str = ''
-        else:
-            # Single amount column
-            amount_str = row[column_mapping['amount']]
-
-        # Skip empty rows
-        if not date_str and not description and not amount_str:
-            return None
+        stream = CSVParser._text_stream(file_content)
+        headers = next(csv.reader(stream), None)
+        if not headers:
+            raise ValueError("CSV file is empty or has no headers")
 
-        return {
-            'date': CSVParser.detect_date_format(date_str),
-            'description': description.strip(),
-            'amount': CSVParser.parse_amount(amount_str)
-        }
+        column_mapping = CSVParser.detect_columns(headers)
+        stream.seek(0)
+        return stream, column_mapping
+
+    @staticmethod
+    def _iter_batches(stream, column_mapping, batch_size):
+        """
+        Parse the rows of a CSV stream batch_size rows at a time.
+
+        Args:
+            stream: Text stream positioned at the header row
+            column_mapping: Columns detected by detect_columns()
+            batch_size: Number of CSV rows read per batch, or None to read all
+                rows as one batch
+
+        Yields:
+            tuple: (transactions, errors) as described in parse_csv_iter()
+        """
+        amount_columns = column_mapping['amount_columns'] or [column_mapping['amount']]
+
+        # Tokenize only the needed columns with pandas' C parser. Every value is
+        # read as a string; index_col=False keeps rows with extra trailing
+        # fields aligned to the header instead of shifting them.
+        reader = pd.read_csv(
+            stream,
+            usecols=list(dict.fromkeys([
+                column_mapping['date'], column_mapping['description'], *amount_columns
+            ])),
+            dtype=str,
+            keep_default_na=False,
+            index_col=False,
+            chunksize=batch_size,
+        )
+        # Without a chunksize pandas returns the whole file as one frame
+        frames = reader if batch_size else (reader,)
+
+        errors = []
+        format_cache = [None]
+        parse_amount = CSVParser.parse_amount
+        for frame in frames:
+            date_strings = frame[column_mapping['date']]
+            descriptions = frame[column_mapping['description']]
+            if len(amount_columns) == 1:
+                amount_strings = frame[amount_columns[0]]
+            else:
+                # Multiple amount columns (e.g. CAD$, USD$ in Canadian banks):
+                # take the first non-empty value
+                amount_strings = frame[amount_columns[0]].str.strip()
+                for column in amount_columns[1:]:
+                    amount_strings = amount_strings.where(
+                        amount_strings != '', frame[column].str.strip()
+                    )
+
+            # Skip empty rows. The index runs on across batches, so rows are
+            # numbered from 2 like the file's data lines
+            keep = (date_strings != '') | (descriptions != '') | (amount_strings != '')
+            row_numbers = (frame.index[keep] + 2).tolist()
+            descriptions = descriptions[keep].str.strip().tolist()
+            amount_strings = amount_strings[keep].tolist()
+            date_strings = date_strings[keep].tolist()
+
+            # Parse the batch's dates at once; rows the bulk pass cannot
+            # handle fall back to per-row parsing
+            dates = CSVParser.parse_dates(date_strings)
+            transactions = []
+            for row_num, date_string, date, description, amount_string in zip(
+                row_numbers, date_strings, dates, descriptions, amount_strings
+            ):
+                try:
+                    transactions.append({
+                        'date': date or CSVParser.detect_date_format(date_string, format_cache),
+                        'description': description,
+                        'amount': parse_amount(amount_string),
+                    })
+                except (ValueError, TypeError) as e:
+                    errors.append(f"Row {row_num}: {e}")
+
+            yield transactions, errors
+
+    @staticmethod
+    def parse_csv_iter(file_content, batch_size=PARSE_BATCH_SIZE):
+        """
+        Parse CSV file with auto-detection of format, one batch of rows at a time.
+
+        Only one batch of transaction dicts is held in memory unless the
+        caller keeps them, so large uploads can be saved as they are parsed.
+
+        Args:
+            file_content: File content (string, bytes, or text stream)
+            batch_size: Number of CSV rows read per batch
+
+        Yields:
+            tuple: (transactions, errors) where transactions are the dicts
+            parsed from the batch (possibly empty) and errors is the list of
+            error messages for rows skipped so far
+
+        Raises:
+            ValueError: If the file has no headers or required columns are missing
+        """
+        stream, column_mapping = CSVParser._read_columns(file_content)
+        yield from CSVParser._iter_batches(stream, column_mapping, batch_size)
 
     @staticmethod
     def parse_csv(file_content, filename=None):
         """
         Parse CSV file with auto-detection of format.
 
+        Collects the rows parse_csv_iter() would yield into one list.
+
         Args:
-            file_content: File content (string or bytes)
+            file_content: File content (string, bytes, or text stream)
             filename: Optional filename for reference
 
         Returns:
@@ -269,30 +476,12 @@ class CSVParser:
                 'errors': List of error messages for skipped rows
             }
         """
-        # Convert bytes to string if needed
-        if isinstance(file_content, bytes):
-            file_content = file_content.decode('utf-8')
-
-        # Parse CSV and detect columns
-        reader = csv.DictReader(io.StringIO(file_content))
-        if not reader.fieldnames:
-            raise ValueError("CSV file is empty or has no headers")
-
-        column_mapping = CSVParser.detect_columns(reader.fieldnames)
-
-        # Parse rows
+        stream, column_mapping = CSVParser._read_columns(file_content)
         transactions = []
         errors = []
-        row_num = 1
-
-        for row in reader:
-            row_num += 1
-            try:
-                transaction = CSVParser._parse_row(row, column_mapping)
-                if transaction:
-                    transactions.append(transaction)
-            except (ValueError, KeyError, IndexError, TypeError) as e:
-                errors.append(f"Row {row_num}: {str(e)}")
+        # One batch: the whole list is kept anyway, so skip the per-batch overhead
+        for batch, errors in CSVParser._iter_batches(stream, column_mapping, None):
+            transactions.extend(batch)
 
         return {
             'transactions': transactions,
@@ -309,7 +498,7 @@ class CSVParser:
         Quick check to see if file is valid.
 
         Args:
-            file_content: File content (string or bytes)
+            file_content: File content (string, bytes, or text stream)
 
         Returns:
             dict: {
@@ -319,15 +508,13 @@ class CSVParser:
             }
         """
         try:
-            # Convert bytes to string if needed
-            if isinstance(file_content, bytes):
-                file_content = file_content.decode('utf-8')
-
-            # Parse CSV headers
-            csv_file = io.StringIO(file_content)
-            reader = csv.DictReader(csv_file)
-
-            headers = reader.fieldnames
+            # Read only the header row. Strings are split lazily so a large
+            # upload is not copied into a StringIO for one line.
+            if isinstance(file_content, str):
+                lines = CSVParser._iter_lines(file_content)
+            else:
+                lines = CSVParser._text_stream(file_content)
+            headers = next(csv.reader(lines), None)
             if not headers:
                 return {
                     'valid': False,
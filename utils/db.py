@@ -6,3 +6,95 @@ from flask_pymongo import PyMongo
 
 # Create a MongoDB instance (initialized by app in app.py)
 mongo = PyMongo()
+
+
+def page_stages(
+    sort: dict,
+    offset: int = 0,
+    limit: int = 0,
+    projection: dict | None = None,
+    extra_stages: list | None = None,
+) -> list:
+    """
+    Build the aggregation stages that select and shape one page of documents.
+
+    Args:
+        sort: Sort specification, e.g. {'date': -1}
+        offset: Number of documents to skip
+        limit: Maximum number of documents to return (0 = no limit)
+        projection: Optional inclusion projection
+        extra_stages: Optional stages applied to the page (e.g. $lookup joins)
+
+    Returns:
+        list: Aggregation pipeline stages
+    """
+    stages = [{'$sort': sort}, {'$skip': offset}]
+    if limit:
+        stages.append({'$limit': limit})
+    if projection:
+        stages.append({'$project': projection})
+    if extra_stages:
+        stages.extend(extra_stages)
+    return stages
+
+
+def find_page(
+    collection,
+    query: dict,
+    sort: dict,
+    offset: int = 0,
+    limit: int = 0,
+    projection: dict | None = None,
+    extra_stages: list | None = None,
+) -> tuple:
+    """
+    Fetch one page of documents and the total match count together.
+
+    Filtered queries run a single $facet aggregation so the page and the
+    count share one $match evaluation and one round-trip. Unfiltered
+    queries run the page on its own and take the total from collection
+    metadata instead of a scan. In both cases $sort stays outside the
+    $facet, where it can use an index.
+
+    Args:
+        collection: MongoDB collection to query
+        query: MongoDB filter dict
+        sort: Sort specification, e.g. {'date': -1}
+        offset: Number of documents to skip
+        limit: Maximum number of documents to return (0 = no limit)
+        projection: Optional inclusion projection
+        extra_stages: Optional stages applied to the page (e.g. $lookup joins)
+
+    Returns:
+        tuple: (documents, total_count)
+    """
+    stages = page_stages(sort, offset, limit, projection, extra_stages)
+    if not query:
+        return list(collection.aggregate(stages)), count_matching(collection, query)
+
+    sort_stage, *page = stages
+    result = next(collection.aggregate([
+        {'$match': query},
+        sort_stage,
+        {'$facet': {'data': page, 'total': [{'$count': 'n'}]}},
+    ]))
+    total_count = result['total'][0]['n'] if result['total'] else 0
+    return result['data'], total_count
+
+
+def count_matching(collection, query: dict) -> int:
+    """
+    Count documents matching a filter.
+
+    Unfiltered counts come from collection metadata instead of a scan.
+
+    Args:
+        collection: MongoDB collection to count
+        query: MongoDB filter dict
+
+    Returns:
+        int: Number of matching documents
+    """
+    if query:
+        return collection.count_documents(query)
+    return collection.estimated_document_count()
@@ -4,6 +4,27 @@ Sets up default categories and creates indexes on the first run.
 """
 from datetime import datetime, UTC
 
+from flask import current_app
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from utils.aggregations import SUMMARY_TTL_SECONDS, TOP_MERCHANTS_INDEX, Aggregations
+from utils.cache import categorizer_cache, category_cache
+
+
+def _drop_indexes(collection, names: list) -> None:
+    """
+    Drop indexes superseded by newer ones, if they exist.
+
+    Args:
+        collection: MongoDB collection
+        names: Index names, e.g. 'date_1'
+    """
+    existing = collection.index_information()
+    for name in names:
+        if name in existing:
+            collection.drop_index(name)
+
 
 def init_db(mongo) -> dict:
     """
@@ -17,6 +38,8 @@ def init_db(mongo) -> dict:
         dict: Status of initialization with counts
     """
     db = mongo.db
+    # One creation timestamp for everything seeded by this run
+    now = datetime.now(UTC)
 
     # Default categories ordered by priority of need (Maslow for money)
     default_categories = [
@@ -28,7 +51,7 @@ def init_db(mongo) -> dict:
             'color': '#9E9E9E',
             'monthly_limit': 0.0,
             'is_system': True,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 1,
@@ -37,7 +60,7 @@ def init_db(mongo) -> dict:
             'color': '#616161',
             'monthly_limit': 0.0,
             'is_system': True,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 2,
@@ -46,7 +69,7 @@ def init_db(mongo) -> dict:
             'color': '#546E7A',
             'monthly_limit': 0.0,
             'is_system': True,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Housing ────────────────────────────────────────────────
         {
@@ -55,7 +78,7 @@ def init_db(mongo) -> dict:
             'description': 'Mortgage/rent, property tax, home insurance, and maintenance',
             'color': '#795548',
             'monthly_limit': 1500.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 4,
@@ -63,7 +86,7 @@ def init_db(mongo) -> dict:
             'description': 'Electric, water, and heating/natural gas bills',
             'color': '#1E88E5',
             'monthly_limit': 300.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 5,
@@ -71,7 +94,7 @@ def init_db(mongo) -> dict:
             'description': 'Internet, cable, cell phones, and home phone',
             'color': '#00ACC1',
             'monthly_limit': 200.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Transportation ─────────────────────────────────────────
         {
@@ -80,7 +103,7 @@ def init_db(mongo) -> dict:
             'description': 'Car payments, auto insurance, and vehicle maintenance',
             'color': '#607D8B',
             'monthly_limit': 400.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 7,
@@ -88,7 +111,7 @@ def init_db(mongo) -> dict:
             'description': 'Fuel and gas station purchases',
             'color': '#FF9800',
             'monthly_limit': 200.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Food ───────────────────────────────────────────────────
         {
@@ -97,7 +120,7 @@ def init_db(mongo) -> dict:
             'description': 'Food, household items, and grocery shopping',
             'color': '#4CAF50',
             'monthly_limit': 500.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 9,
@@ -105,7 +128,7 @@ def init_db(mongo) -> dict:
             'description': 'Dining out, takeout, and food delivery',
             'color': '#EF5350',
             'monthly_limit': 300.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Health & Personal ──────────────────────────────────────
         {
@@ -114,7 +137,7 @@ def init_db(mongo) -> dict:
             'description': 'Doctor visits, pharmacy, dental, and health/dental insurance premiums',
             'color': '#66BB6A',
             'monthly_limit': 200.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 11,
@@ -122,7 +145,7 @@ def init_db(mongo) -> dict:
             'description': 'Haircuts, salon, spa, and personal hygiene products',
             'color': '#F06292',
             'monthly_limit': 100.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Family ─────────────────────────────────────────────────
         {
@@ -131,7 +154,7 @@ def init_db(mongo) -> dict:
             'description': 'Clothes and shoes for the whole family',
             'color': '#EC407A',
             'monthly_limit': 150.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 13,
@@ -139,7 +162,7 @@ def init_db(mongo) -> dict:
             'description': 'Day care, school fees, tutoring, school supplies, and extracurriculars',
             'color': '#FFA726',
             'monthly_limit': 0.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Lifestyle ──────────────────────────────────────────────
         {
@@ -148,7 +171,7 @@ def init_db(mongo) -> dict:
             'description': 'Movies, games, hobbies, and leisure activities',
             'color': '#AB47BC',
             'monthly_limit': 150.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 15,
@@ -156,7 +179,7 @@ def init_db(mongo) -> dict:
             'description': 'Streaming services, software, and recurring digital subscriptions',
             'color': '#7E57C2',
             'monthly_limit': 50.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Financial ──────────────────────────────────────────────
         {
@@ -165,7 +188,7 @@ def init_db(mongo) -> dict:
             'description': 'Money set aside in savings accounts',
             'color': '#26A69A',
             'monthly_limit': 0.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 17,
@@ -173,7 +196,7 @@ def init_db(mongo) -> dict:
             'description': 'Stocks, retirement, and investment accounts',
             'color': '#009688',
             'monthly_limit': 1000.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Giving ─────────────────────────────────────────────────
         {
@@ -182,7 +205,7 @@ def init_db(mongo) -> dict:
             'description': 'Birthday, holiday, and special occasion gifts',
             'color': '#FF7043',
             'monthly_limit': 100.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         {
             'id': 19,
@@ -190,7 +213,7 @@ def init_db(mongo) -> dict:
             'description': 'Charitable giving and religious contributions',
             'color': '#5C6BC0',
             'monthly_limit': 100.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
         # ── Other ──────────────────────────────────────────────────
         {
@@ -199,27 +222,59 @@ def init_db(mongo) -> dict:
             'description': 'Bank fees, service charges, and account fees',
             'color': '#78909C',
             'monthly_limit': 0.0,
-            'created_date': datetime.now(UTC)
+            'created_date': now
         },
     ]
 
     categories_created = 0
     categories_existing = 0
 
-    # Insert default categories if they don't exist
+    # Insert default categories if they don't exist. Existing categories are
+    # read in one query and the missing ones written in one insert_many.
+    existing_by_id = {}
+    existing_by_name = {}
+    for existing in db.categories.find({}, {'_id': 0, 'id': 1, 'name': 1, 'is_system': 1}):
+        existing_by_id.setdefault(existing.get('id'), existing)
+        existing_by_name.setdefault(existing.get('name'), existing)
+
+    new_categories = []
+    backfill_ids = []
     for category in default_categories:
-        if existing := db.categories.find_one(
-            {'$or': [{'id': category['id']}, {'name': category['name']}]}
-        ):
+        if existing := (existing_by_id.get(category['id'])
+                        or existing_by_name.get(category['name'])):
             # Backfill is_system flag on existing system categories
             if category.get('is_system') and not existing.get('is_system'):
-                db.categories.update_one({'id': category['id']}, {'$set': {'is_system': True}})
+                backfill_ids.append(category['id'])
             categories_existing += 1
         else:
-            db.categories.insert_one(category)
-            categories_created += 1
-    # Create a unique index on category id field
+            new_categories.append(category)
+
+    if new_categories:
+        db.categories.insert_many(new_categories, ordered=False)
+        categories_created = len(new_categories)
+    if backfill_ids:
+        db.categories.update_many({'id': {'$in': backfill_ids}}, {'$set': {'is_system': True}})
+    category_cache.clear()
+    categorizer_cache.clear()
+
+    # Seed the category ID counter so new IDs continue after the highest existing one
+    if highest := db.categories.find_one(sort=[('id', -1)]):
+        db.counters.update_one(
+            {'_id': 'category_id'},
+            {'$max': {'seq': highest['id']}},
+            upsert=True,
+        )
+
+    # Create unique indexes on category id and name fields
     db.categories.create_index('id', unique=True)
+    # Older versions allowed renaming a category to an existing name. Skip
+    # only this index on such databases so the app still starts.
+    try:
+        db.categories.create_index('name', unique=True)
+    except DuplicateKeyError as e:
+        current_app.logger.warning(
+            'Duplicate category names; rename them to enable the unique name index: %s', e
+        )
 
     # Seed default account
     if not db.accounts.find_one({'id': 1}):
@@ -231,27 +286,59 @@ def init_db(mongo) -> dict:
             'color': '#42A5F5',
             'currency': 'CAD',
             'is_active': True,
-            'created_date': datetime.now(UTC),
+            'created_date': now,
         })
     db.accounts.create_index('id', unique=True)
 
     # Migrate: tag existing positive uncategorized transactions as Entry
-    db.transactions.update_many(
+    migrated = db.transactions.update_many(
         {'amount': {'$gt': 0}, 'category_id': 0},
         {'$set': {'category_id': 1, 'auto_categorized': True, 'confidence': 1.0}}
     )
+    if migrated.modified_count:
+        Aggregations.invalidate_monthly_summaries(mongo)
 
-    # Create indexes for the transaction collection
-    db.transactions.create_index('date')
-    db.transactions.create_index('category_id')
-    db.transactions.create_index([('date', 1), ('category_id', 1)])
+    # Migrate: backfill the upper-cased description used by pattern lookups
+    db.transactions.update_many(
+        {'description_upper': {'$exists': False}},
+        [{'$set': {'description_upper': {'$toUpper': '$description'}}}]
+    )
+
+    # Create indexes for the transaction collection. Each collection's indexes
+    # are sent in one createIndexes command, which builds them together.
+    # Every import maintains each of these, so none is a prefix of another.
+    db.transactions.create_indexes([
+        # Serves category-filtered listings sorted by date, and category_id lookups
+        IndexModel([('category_id', 1), ('date', -1)]),
+        # Covering indexes for the date-range chart aggregations
+        # (aggregate_by_category and get_top_merchants); the first also
+        # serves date-sorted listings and date-range filters
+        IndexModel([('date', 1), ('category_id', 1), ('amount', 1)]),
+        IndexModel(TOP_MERCHANTS_INDEX),
+        # Serves batch_categorize_similar's pattern match on uncategorized rows
+        IndexModel([('category_id', 1), ('description_upper', 1)]),
+        # Finds the transactions imported from a given upload
+        IndexModel('source_file'),
+    ])
+    # Migrate: drop indexes now covered by the compound indexes above
+    _drop_indexes(db.transactions, ['date_1', 'category_id_1', 'date_1_category_id_1'])
 
     # Create indexes for the categorization_rules collection
-    db.categorization_rules.create_index('pattern')
-    db.categorization_rules.create_index('category_id')
+    db.categorization_rules.create_indexes([
+        IndexModel('pattern'),
+        IndexModel('category_id'),
+        # Serves the existing-rule lookup in learn_from_categorization
+        IndexModel([('match_type', 1), ('pattern', 1)]),
+        # Serves AutoCategorizer._load_rules (rules by type in use_count order)
+        IndexModel([('match_type', 1), ('use_count', -1)]),
+    ])
+
+    # Create an index for uploads collection, in upload history order
+    db.uploads.create_index([('upload_date', -1), ('_id', -1)])
+    _drop_indexes(db.uploads, ['upload_date_1'])
 
-    # Create an index for uploads collection
-    db.uploads.create_index('upload_date')
+    # Expire materialized chart summaries so they are periodically rebuilt
+    db.monthly_summaries.create_index('computed_at', expireAfterSeconds=SUMMARY_TTL_SECONDS)
 
     return {
         'categories_created': categories_created,
@@ -279,6 +366,10 @@ def reset_db(mongo) -> dict:
     db.categorization_rules.drop()
     db.uploads.drop()
     db.accounts.drop()
+    db.counters.drop()
+    db.monthly_summaries.drop()
+    category_cache.clear()
+    categorizer_cache.clear()
 
     return {
         'status': 'Database reset complete',
@@ -288,5 +379,7 @@ def reset_db(mongo) -> dict:
             'categorization_rules',
             'uploads',
             'accounts',
+            'counters',
+            'monthly_summaries',
         ],
     }
@@ -0,0 +1,56 @@
+"""
+Keyword matcher utility.
+Aho-Corasick automaton for finding the highest-priority keyword in a text.
+"""
+import ahocorasick
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword substring matcher built on an Aho-Corasick automaton.
+
+    Keywords are ranked by insertion order (earlier wins). search() scans a
+    text once in C (pyahocorasick), so its cost depends on the text length
+    rather than the number of keywords.
+    """
+
+    def __init__(self, keywords):
+        """
+        Build the automaton.
+
+        Args:
+            keywords: Iterable of (keyword, value) pairs in priority order
+        """
+        self._values = []
+        self._automaton = ahocorasick.Automaton()
+        # An empty keyword is contained in every text
+        self._empty_rank = None
+
+        for rank, (keyword, value) in enumerate(keywords):
+            self._values.append(value)
+            if not keyword:
+                if self._empty_rank is None:
+                    self._empty_rank = rank
+            elif keyword not in self._automaton:
+                # Each keyword stores its best (lowest) rank
+                self._automaton.add_word(keyword, rank)
+
+        if len(self._automaton):
+            self._automaton.make_automaton()
+
+    def search(self, text: str):
+        """
+        Find the highest-priority keyword contained in text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            The value paired with the best matching keyword, or None
+        """
+        best = self._empty_rank
+        if self._automaton.kind == ahocorasick.AHOCORASICK:
+            for _, rank in self._automaton.iter(text):
+                if best is None or rank < best:
+                    best = rank
+        return None if best is None else self._values[best]
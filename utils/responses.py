@@ -4,7 +4,10 @@ Standardized response helpers to eliminate code duplication.
 """
 from datetime import datetime
 
-from flask import jsonify
+import orjson
+from bson import ObjectId
+from flask import Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 
 
 def doc_to_json(doc: dict) -> dict:
@@ -19,12 +22,80 @@ def doc_to_json(doc: dict) -> dict:
     Returns:
         dict: JSON-serializable copy of the document
     """
-    result = doc.copy()
-    if '_id' in result:
-        result['_id'] = str(result['_id'])
-    if 'created_date' in result and isinstance(result['created_date'], datetime):
-        result['created_date'] = result['created_date'].isoformat()
-    return result
+    # Convert while building the result rather than copying and then patching it
+    return {
+        key: (
+            str(value) if key == '_id'
+            else value.isoformat() if key == 'created_date' and isinstance(value, datetime)
+            else value
+        )
+        for key, value in doc.items()
+    }
+
+
+def _json_default(obj):
+    """
+    Serialize types orjson does not handle natively.
+
+    Args:
+        obj: Object that orjson could not encode
+
+    Returns:
+        str: String form of a MongoDB ObjectId
+
+    Raises:
+        TypeError: If the object type is not supported
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def fast_json(data) -> bytes:
+    """
+    Encode data as JSON with orjson.
+
+    ObjectId values become strings and datetimes become ISO 8601 strings,
+    matching doc_to_json, so raw MongoDB documents can be passed directly.
+
+    Args:
+        data: JSON-compatible data, possibly containing ObjectId/datetime values
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Used for request bodies, jsonify and the test client, so every JSON
+    path in the app shares fast_json's encoding.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Encode obj with fast_json; formatting options are ignored."""
+        return fast_json(obj).decode('utf-8')
+
+    def loads(self, s: str | bytes, **kwargs):
+        """Decode a JSON document with orjson."""
+        return orjson.loads(s)
+
+
+def json_response(payload, status_code: int = 200) -> tuple:
+    """
+    Create a JSON response encoded with fast_json.
+
+    Args:
+        payload: Response body
+        status_code: HTTP status code
+
+    Returns:
+        tuple: (Response, status code)
+    """
+    return Response(fast_json(payload), mimetype='application/json'), status_code
 
 
 def error_response(code: str, message: str, status_code: int = 400) -> tuple:
@@ -39,13 +110,13 @@ def error_response(code: str, message: str, status_code: int = 400) -> tuple:
     Returns:
         tuple: (JSON response, status code)
     """
-    return jsonify({
+    return json_response({
         'success': False,
         'error': {
             'code': code,
             'message': message,
         }
-    }), status_code
+    }, status_code)
 
 
 def success_response(data=None, message: str = '', status_code: int = 200, **kwargs) -> tuple:
@@ -53,7 +124,7 @@ def success_response(data=None, message: str = '', status_code: int = 200, **kwa
     Create standardized success response.
 
     Args:
-        data: Response data (dict, list, or None)
+        data: Response data (dict, list, or None); may contain raw MongoDB documents
         message: Optional success message
         status_code: HTTP status code
         **kwargs: Additional fields (count, total, etc.)
@@ -71,4 +142,35 @@ def success_response(data=None, message: str = '', status_code: int = 200, **kwa
 
     response.update(kwargs)
 
-    return jsonify(response), status_code
+    return json_response(response, status_code)
+
+
+def stream_list_response(items, **kwargs) -> tuple:
+    """
+    Create a success response whose data array is streamed item by item.
+
+    The body has the same shape as success_response(data=[...], count=N, ...)
+    but items are encoded as they are read from the iterable (e.g. a MongoDB
+    cursor), so large result sets are never materialized in memory. count is
+    written after the array, once it is known.
+
+    Args:
+        items: Iterable of JSON-compatible items (raw MongoDB documents allowed)
+        **kwargs: Additional top-level fields (total, limit, etc.)
+
+    Returns:
+        tuple: (streaming Response, 200)
+    """
+    def generate():
+        yield b'{"success":true,"data":['
+        count = 0
+        for item in items:
+            if count:
+                yield b','
+            yield fast_json(item)
+            count += 1
+        kwargs['count'] = count
+        # Append the remaining fields to the outer object: '{...}' -> ',...}'
+        yield b'],' + fast_json(kwargs)[1:]
+
+    return Response(stream_with_context(generate()), mimetype='application/json'), 200
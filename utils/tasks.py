@@ -0,0 +1,47 @@
+"""
+Background task utilities.
+Bounded thread pool for work that should not block the HTTP response.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from flask import Flask, current_app
+
+
+def init_executor(app: Flask) -> None:
+    """
+    Attach a bounded thread pool to the application.
+
+    Args:
+        app: Flask application instance
+    """
+    app.extensions['executor'] = ThreadPoolExecutor(
+        max_workers=app.config['BACKGROUND_WORKERS'],
+        thread_name_prefix='budget-task',
+    )
+
+
+def submit_task(func, *args, **kwargs) -> Future:
+    """
+    Run a function on the application's thread pool inside an app context.
+
+    Exceptions are logged rather than lost with the discarded future.
+
+    Args:
+        func: Callable to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Future: Handle to the running task
+    """
+    app = current_app._get_current_object()  # pylint: disable=protected-access
+
+    def run():
+        with app.app_context():
+            try:
+                return func(*args, **kwargs)
+            except Exception:  # pylint: disable=broad-exception-caught
+                app.logger.exception('Background task %s failed', func.__name__)
+                return None
+
+    return app.extensions['executor'].submit(run)
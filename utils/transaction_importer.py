@@ -2,56 +2,241 @@
 Transaction importer utility.
 Shared logic for processing and saving parsed CSV transactions.
 """
+import queue
+import threading
+import time
+from datetime import datetime, UTC
+
+from flask import current_app
+from pymongo import WriteConcern
+from pymongo.errors import PyMongoError
+
 from models.transaction import Transaction
+from utils.aggregations import Aggregations
 from utils.db import mongo
 
+# Batches waiting for the writer thread before categorization blocks
+INSERT_QUEUE_SIZE = 4
+# Status recorded on the uploads document once its transactions are saved
+UPLOAD_STATUS_PROCESSED = 'processed'
+# Status recorded when saving the transactions failed part-way
+UPLOAD_STATUS_FAILED = 'failed'
+# Unacknowledged (w=0) batches may still be applying when the final count
+# runs, so it is retried this many times, this many seconds apart
+UNACKNOWLEDGED_CONFIRM_ATTEMPTS = 20
+UNACKNOWLEDGED_CONFIRM_DELAY = 0.05
+
+
+def _insert_batches(collection, last_collection, batches: queue.Queue, failures: list) -> None:
+    """
+    Writer thread: insert queued batches until the None sentinel arrives.
+
+    Each batch is held until the next one arrives, so the final batch is
+    known and goes through last_collection. After the first failure the
+    remaining batches are drained unwritten so the producer never blocks on
+    a full queue. Any exception is caught for this reason, not only
+    PyMongoError (e.g. bson's InvalidDocument).
+
+    Args:
+        collection: Transactions collection to insert into
+        last_collection: Collection used for the final batch
+        batches: Queue of document lists, terminated by None
+        failures: Receives the first exception raised by an insert
+    """
+    pending = None
+    while True:
+        batch = batches.get()
+        if pending is not None and not failures:
+            try:
+                (collection if batch is not None else last_collection).insert_many(
+                    pending, ordered=False
+                )
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                failures.append(e)
+        if batch is None:
+            return
+        pending = batch
+
+
+def _await_saved(collection, query: dict, expected: int) -> int:
+    """
+    Count saved transactions, retrying while unacknowledged inserts may still apply.
+
+    Args:
+        collection: Transactions collection with an acknowledged write concern
+        query: Filter matching the upload's transactions
+        expected: Number of transactions sent
+
+    Returns:
+        int: The last count, which is below expected if they never all arrived
+    """
+    for attempt in range(UNACKNOWLEDGED_CONFIRM_ATTEMPTS):
+        if attempt:
+            time.sleep(UNACKNOWLEDGED_CONFIRM_DELAY)
+        saved = collection.count_documents(query)
+        if saved >= expected:
+            break
+    return saved
+
 
 def process_transactions(
-    parse_result: dict,
+    parsed_batches,
     filename: str,
     categorizer,
     account_id: int | None = None,
     account_type: str | None = None,
-) -> tuple:
+) -> dict | None:
     """
-    Process and save transactions from parsed CSV data.
+    Process and save transactions from parsed CSV data, then record the upload.
+
+    Consumes the batches from CSVParser.parse_csv_iter() as they are parsed,
+    so only a few batches of transactions are in memory at once. Each batch
+    is categorized, turned into Transaction documents, and inserted. A writer
+    thread performs the inserts so categorization of the next batch overlaps
+    the database round-trip of the previous one. Rule usage recorded by the
+    categorizer is written once at the end.
 
-    Categorizes each transaction, creates a Transaction document, and inserts
-    it into the database. Returns counts for reporting.
+    With UNACKNOWLEDGED_IMPORTS every batch but the last is inserted with
+    w=0, so individual insert errors are not reported. The last batch is
+    acknowledged, and the upload's transactions are then counted, retrying
+    briefly while earlier batches may still be applying. A count that stays
+    short of the rows created fails the import.
+
+    If parsing fails part-way, the transactions already saved are deleted and
+    the error is raised, so a file that cannot be read imports nothing.
+
+    The uploads record is written, and the monthly summaries invalidated,
+    only after the inserts were acknowledged (or counted). The record shares
+    its upload_date with the transactions it imported. If saving failed, the
+    record is still written with status 'failed' before the error is raised,
+    so any transactions that were saved stay traceable to their upload. A
+    multi-document transaction is not used: it needs a replica set, rules
+    out w=0 imports, and a session cannot be shared with the writer thread.
 
     Args:
-        parse_result: Parsed CSV data from CSVParser.parse_csv()
+        parsed_batches: Iterable of (transactions, errors) from CSVParser.parse_csv_iter()
         filename: The source filename for tagging each transaction
         categorizer: An AutoCategorizer instance
         account_id: The account ID to associate with each transaction
         account_type: The account type string (e.g. 'savings') used for categorization
 
     Returns:
-        tuple: (row_count, categorized_count, uncategorized_count)
+        dict: The uploads document that was recorded, or None if the file held
+        no valid transactions (nothing is recorded then)
+
+    Raises:
+        ValueError: If the CSV could not be parsed (nothing is kept)
+        UnicodeDecodeError: If the CSV is not valid UTF-8 (nothing is kept)
+        PyMongoError: If inserting a batch failed, or with UNACKNOWLEDGED_IMPORTS
+            if fewer transactions were saved than created
+        bson.errors.BSONError: If a batch could not be encoded
     """
     categorized_count = 0
     uncategorized_count = 0
+    errors = []
+    first_date = None
+    months = set()
+    acknowledged = mongo.db.transactions
+    unacknowledged = current_app.config['UNACKNOWLEDGED_IMPORTS']
+    collection = acknowledged
+    if unacknowledged:
+        collection = acknowledged.with_options(write_concern=WriteConcern(w=0))
+
+    # One import timestamp shared by every transaction in the upload
+    upload_date = datetime.now(UTC)
+    saved_query = {'source_file': filename, 'upload_date': upload_date}
+
+    batches = queue.Queue(maxsize=INSERT_QUEUE_SIZE)
+    failures = []
+    writer = threading.Thread(
+        target=_insert_batches,
+        args=(collection, acknowledged, batches, failures),
+        name='budget-import-writer',
+        daemon=True,
+    )
+    writer.start()
+
+    # Bind hot-loop callables to locals to skip attribute lookups per row
+    create = Transaction.create
+
+    try:
+        for rows, errors in parsed_batches:
+            if not rows:
+                continue
+            categorizations = categorizer.categorize_batch(
+                [row['description'] for row in rows],
+                [row['amount'] for row in rows],
+                account_type=account_type,
+            )
+            batch = []
+            for row, categorization in zip(rows, categorizations):
+                auto_categorized = categorization['match_type'] != 'none'
+                batch.append(create(
+                    date=row['date'],
+                    description=row['description'],
+                    amount=row['amount'],
+                    category_id=categorization['category_id'],
+                    source_file=filename,
+                    auto_categorized=auto_categorized,
+                    confidence=categorization['confidence'],
+                    account_id=account_id,
+                    upload_date=upload_date,
+                ))
+                if auto_categorized:
+                    categorized_count += 1
+                else:
+                    uncategorized_count += 1
+            if first_date is None:
+                first_date = batch[0]['date']
+            months.update({(txn['date'].year, txn['date'].month) for txn in batch})
+            batches.put(batch)
+    except Exception:  # pylint: disable=broad-exception-caught
+        # The file could not be read to the end: remove what was already saved
+        batches.put(None)
+        writer.join()
+        created = categorized_count + uncategorized_count
+        if created:
+            if unacknowledged:
+                _await_saved(acknowledged, saved_query, created)
+            acknowledged.delete_many(saved_query)
+            Aggregations.invalidate_monthly_summaries(
+                mongo, [datetime(year, month, 1) for year, month in months]
+            )
+        raise
+    batches.put(None)
+    writer.join()
+
+    created = categorized_count + uncategorized_count
+    if not created and not failures:
+        return None
+
+    if unacknowledged and not failures:
+        # w=0 inserts report no errors: confirm every transaction was saved
+        saved = _await_saved(acknowledged, saved_query, created)
+        if saved < created:
+            failures.append(PyMongoError(
+                f'Only {saved} of {created} imported transactions were saved'
+            ))
+
+    categorizer.flush_rule_usage(now=upload_date)
+    Aggregations.invalidate_monthly_summaries(
+        mongo, [datetime(year, month, 1) for year, month in months]
+    )
 
-    for row in parse_result['transactions']:
-        categorization = categorizer.categorize(
-            row['description'],
-            row['amount'],
-            account_type=account_type,
-        )
-        transaction = Transaction.create(
-            date=row['date'],
-            description=row['description'],
-            amount=row['amount'],
-            category_id=categorization['category_id'],
-            source_file=filename,
-            auto_categorized=(categorization['match_type'] != 'none'),
-            confidence=categorization['confidence'],
-            account_id=account_id,
-        )
-        mongo.db.transactions.insert_one(transaction)
-        if categorization['match_type'] != 'none':
-            categorized_count += 1
-        else:
-            uncategorized_count += 1
-
-    return parse_result['row_count'], categorized_count, uncategorized_count
+    upload = {
+        'filename': filename,
+        'upload_date': upload_date,
+        'row_count': created,
+        'month': (first_date or upload_date).strftime('%Y-%m'),
+        'status': UPLOAD_STATUS_FAILED if failures else UPLOAD_STATUS_PROCESSED,
+        'categorized_count': categorized_count,
+        'uncategorized_count': uncategorized_count,
+        'errors': errors,
+        'account_id': account_id,
+    }
+    if failures:
+        upload['errors'] = [*errors, f'Import failed: {failures[0]}']
+    mongo.db.uploads.insert_one(upload)
+    if failures:
+        raise failures[0]
+    return upload
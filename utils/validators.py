@@ -1,11 +1,48 @@
 """
 Validation utilities for request data.
 """
+import re
 from datetime import datetime
 
 from bson import ObjectId
-from bson.errors import InvalidId
-from flask import request
+from flask import g, request
+
+_OBJECT_ID_RE = re.compile(r'[0-9a-fA-F]{24}')
+# YYYY-MM-DD; month and day may be one digit, as strptime('%Y-%m-%d') allows
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+
+
+def parse_object_id(value) -> ObjectId | None:
+    """
+    Convert a 24-character hex string to an ObjectId.
+
+    Malformed input is rejected by a precompiled pattern instead of letting
+    ObjectId() raise, which keeps the bad-input path cheap.
+
+    Args:
+        value: Candidate ObjectId string
+
+    Returns:
+        ObjectId, or None if value is not a valid ObjectId string
+    """
+    if isinstance(value, str) and _OBJECT_ID_RE.fullmatch(value):
+        return ObjectId(value)
+    return None
+
+
+def get_json_body():
+    """
+    Return the request's JSON body.
+
+    Flask caches the parsed body on the request, so every validator and
+    view calling this shares one parse. A malformed or non-JSON body gives
+    None, which callers report with their INVALID_REQUEST error instead of
+    Flask's HTML 400/415 page.
+
+    Returns:
+        Parsed JSON value, or None if the body is missing or not valid JSON
+    """
+    return request.get_json(silent=True)
 
 
 def validate_json_request(required_fields: list[str]) -> tuple:
@@ -20,7 +57,7 @@ def validate_json_request(required_fields: list[str]) -> tuple:
     """
     from utils.responses import error_response
 
-    data = request.get_json()
+    data = get_json_body()
 
     if not data:
         return None, error_response('INVALID_REQUEST', 'Request body must be JSON')
@@ -39,6 +76,9 @@ def validate_category_id(category_id: int, mongo) -> tuple:
     """
     Validate that a category ID exists in the database.
 
+    The set of existing category IDs is fetched once per request and cached
+    on ``g``, so repeated validations in the same request cost no queries.
+
     Args:
         category_id: Category ID to validate
         mongo: Flask-PyMongo instance
@@ -48,14 +88,15 @@ def validate_category_id(category_id: int, mongo) -> tuple:
     """
     from utils.responses import error_response
 
-    if not isinstance(category_id, int) or category_id < 0:
+    if not isinstance(category_id, int) or isinstance(category_id, bool) or category_id < 0:
         return False, error_response(
             'INVALID_CATEGORY_ID',
             'category_id must be a non-negative integer',
         )
 
-    category_doc = mongo.db.categories.find_one({'id': category_id})
-    if not category_doc:
+    if 'category_ids' not in g:
+        g.category_ids = set(mongo.db.categories.distinct('id'))
+    if category_id not in g.category_ids:
         return False, error_response(
             'INVALID_CATEGORY_ID',
             f'Category ID {category_id} does not exist',
@@ -69,7 +110,7 @@ def _validate_date_field(date_value: str | datetime) -> datetime:
     Parse and validate a date value from request data.
 
     Passes existing datetime objects through unchanged. Parses strings
-    in YYYY-MM-DD format.
+    in YYYY-MM-DD format with a precompiled regex rather than strptime.
 
     Args:
         date_value: Date string in YYYY-MM-DD format, or an existing datetime object.
@@ -82,7 +123,9 @@ def _validate_date_field(date_value: str | datetime) -> datetime:
     """
     if isinstance(date_value, datetime):
         return date_value
-    return datetime.strptime(date_value, '%Y-%m-%d')
+    if not (match := _ISO_DATE_RE.fullmatch(date_value)):
+        raise ValueError(f'Invalid date: {date_value}')
+    return datetime(int(match[1]), int(match[2]), int(match[3]))
 
 
 def _validate_confidence_field(confidence_value: float | int) -> float:
@@ -104,10 +147,39 @@ def _validate_confidence_field(confidence_value: float | int) -> float:
     return confidence
 
 
+def _strip_text_field(text_value) -> str:
+    """
+    Convert a text value to a stripped string.
+
+    Args:
+        text_value: Value sent for a free-text field
+
+    Returns:
+        str: The value as a string without surrounding whitespace
+    """
+    return str(text_value).strip()
+
+
+# Transaction fields accepted by updates: (field, coercer, error message).
+# A coercer raising ValueError or TypeError rejects the request.
+_TRANSACTION_UPDATE_FIELDS = (
+    ('date', _validate_date_field, 'Invalid date format: {}. Expected YYYY-MM-DD'),
+    ('amount', float, 'Invalid amount: {}'),
+    ('description', _strip_text_field, 'Invalid description: {}'),
+    ('notes', _strip_text_field, 'Invalid notes: {}'),
+    ('auto_categorized', bool, 'Invalid auto_categorized: {}'),
+    ('confidence', _validate_confidence_field, 'Invalid confidence: {}'),
+)
+
+
 def build_transaction_update_doc(data: dict) -> tuple:
     """
     Build MongoDB update document from request data for transaction updates.
 
+    Fields are coerced as listed in _TRANSACTION_UPDATE_FIELDS. category_id
+    is returned as _pending_category_id for the caller to check against the
+    database.
+
     Args:
         data: Request data dictionary
 
@@ -118,59 +190,31 @@ def build_transaction_update_doc(data: dict) -> tuple:
 
     update_doc = {}
 
-    if 'date' in data:
-        try:
-            update_doc['date'] = _validate_date_field(data['date'])
-        except ValueError:
-            return None, error_response(
-                'VALIDATION_ERROR',
-                f'Invalid date format: {data["date"]}. Expected YYYY-MM-DD',
-            )
-
-    if 'amount' in data:
-        try:
-            update_doc['amount'] = float(data['amount'])
-        except (ValueError, TypeError):
-            return None, error_response(
-                'VALIDATION_ERROR',
-                f'Invalid amount: {data["amount"]}',
-            )
+    for field, coerce, error_message in _TRANSACTION_UPDATE_FIELDS:
+        if field in data:
+            try:
+                update_doc[field] = coerce(data[field])
+            except (ValueError, TypeError):
+                return None, error_response('VALIDATION_ERROR', error_message.format(data[field]))
+
+    if 'description' in update_doc:
+        update_doc['description_upper'] = update_doc['description'].upper()
 
     if 'category_id' in data:
         update_doc['_pending_category_id'] = data['category_id']
 
-    if 'description' in data:
-        update_doc['description'] = str(data['description']).strip()
-
-    if 'notes' in data:
-        update_doc['notes'] = str(data['notes']).strip()
-
-    if 'auto_categorized' in data:
-        update_doc['auto_categorized'] = bool(data['auto_categorized'])
-
-    if 'confidence' in data:
-        try:
-            update_doc['confidence'] = _validate_confidence_field(data['confidence'])
-        except (ValueError, TypeError):
-            return None, error_response(
-                'VALIDATION_ERROR',
-                f'Invalid confidence: {data["confidence"]}',
-            )
-
     return update_doc, None
 
 
-def validate_update_request(
-    resource_id: str,
-    collection,
-    resource_name: str = 'resource',
-) -> tuple:
+def validate_update_request(resource_id: str, resource_name: str = 'resource') -> tuple:
     """
     Validate common update request requirements.
 
+    Existence is not checked here; callers should apply the update with
+    find_one_and_update and treat a None result as not found.
+
     Args:
         resource_id: ObjectId string to validate
-        collection: MongoDB collection to check existence
         resource_name: Name of resource for error messages (default: "resource")
 
     Returns:
@@ -178,24 +222,15 @@ def validate_update_request(
     """
     from utils.responses import error_response
 
-    try:
-        object_id = ObjectId(resource_id)
-    except InvalidId:
+    object_id = parse_object_id(resource_id)
+    if object_id is None:
         return None, None, error_response(
             'INVALID_ID',
             f'Invalid {resource_name} ID format: {resource_id}',
         )
 
-    data = request.get_json()
+    data = get_json_body()
     if not data:
         return None, None, error_response('INVALID_REQUEST', 'Request body must be JSON')
 
-    document = collection.find_one({'_id': object_id})
-    if not document:
-        return None, None, error_response(
-            'NOT_FOUND',
-            f'{resource_name.capitalize()} not found: {resource_id}',
-            404,
-        )
-
     return object_id, data, None
@@ -2,7 +2,7 @@
 
 import contextlib
 import json
-from datetime import datetime, UTC
+from datetime import datetime
 from bson import ObjectId
 from flask import (
     Blueprint,
@@ -20,9 +20,10 @@ from werkzeug.utils import secure_filename
 from models.transaction import Transaction
 from models.category import Category
 from models.account import Account, VALID_TYPES as ACCOUNT_TYPES, TYPE_LABELS as ACCOUNT_TYPE_LABELS
-from utils.db import mongo
-from utils.csv_parser import CSVParser, allowed_file
-from utils.categorization import AutoCategorizer
+from utils.cache import category_cache
+from utils.db import find_page, mongo
+from utils.csv_parser import CSVParser, allowed_file, open_upload
+from utils.categorization import AutoCategorizer, get_categorizer
 from utils.aggregations import Aggregations
 from utils.transaction_importer import process_transactions
 
@@ -55,10 +56,10 @@ def _parse_date(s: str) -> datetime | None:
     Returns:
         Parsed datetime, or None if the string is empty or invalid
     """
-    if not s:
+    if not s or len(s) != 10 or s[4] != '-' or s[7] != '-':
         return None
     try:
-        return datetime.strptime(s, '%Y-%m-%d')
+        return datetime.fromisoformat(s)
     except ValueError:
         return None
 
@@ -141,9 +142,8 @@ def dashboard():
         year = int(request.args.get('year', periods[0]['year']))
         year, month = _resolve_period(periods, year, now)
     start_date, end_date = Aggregations.get_date_range(year, month=month)
-    stats = Aggregations.get_summary_stats(mongo, start_date, end_date)
+    stats, category_data = Aggregations.dashboard(mongo, start_date, end_date)
     uncategorized_count = mongo.db.transactions.count_documents({'category_id': 0})
-    category_data = Aggregations.aggregate_by_category(mongo, start_date, end_date)
     budget_status = Aggregations.calculate_budget_status(mongo, year, month)
     trend_data = Aggregations.get_spending_trend(mongo, year, months=6)
     top_merchants = Aggregations.get_top_merchants(mongo, start_date, end_date, limit=10)
@@ -231,11 +231,13 @@ def transactions():
     query = _build_transaction_query(start_date, end_date, category_id, account_id)
     if sort not in ('date', 'amount', 'description'):
         sort = 'date'
-    transaction_list = list(mongo.db.transactions.find(query)
-                            .sort(sort, -1 if order == 'desc' else 1)
-                            .skip((page - 1) * PAGE_SIZE)
-                            .limit(PAGE_SIZE))
-    total = mongo.db.transactions.count_documents(query)
+    transaction_list, total = find_page(
+        mongo.db.transactions,
+        query,
+        {sort: -1 if order == 'desc' else 1},
+        offset=(page - 1) * PAGE_SIZE,
+        limit=PAGE_SIZE,
+    )
     total_pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
     all_categories, all_accounts = _enrich_transactions(transaction_list)
     page_range = list(range(max(1, page - 2), min(total_pages + 1, page + 3)))
@@ -271,6 +273,7 @@ def add_transaction():
             notes=request.form.get('notes', ''),
         )
         mongo.db.transactions.insert_one(transaction)
+        Aggregations.invalidate_monthly_summaries(mongo, [transaction['date']])
         flash('Transaction added.', 'success')
     except (ValueError, KeyError) as e:  # pylint: disable=broad-exception-caught
         flash(f'Error: {e}', 'danger')
@@ -285,18 +288,21 @@ def edit_transaction(transaction_id):
         if transaction := mongo.db.transactions.find_one({'_id': object_id}):
             description = request.form['description'].strip()
             new_category_id = int(request.form.get('category_id', 0))
+            new_date = _parse_date(request.form['date']) or transaction['date']
             mongo.db.transactions.update_one(
                 {'_id': object_id},
                 {
                     '$set': {
-                        'date': _parse_date(request.form['date']) or transaction['date'],
+                        'date': new_date,
                         'description': description,
+                        'description_upper': description.upper(),
                         'amount': float(request.form['amount']),
                         'category_id': new_category_id,
                         'notes': request.form.get('notes', ''),
                     }
                 }
             )
+            Aggregations.invalidate_monthly_summaries(mongo, [transaction['date'], new_date])
             if new_category_id != 0:
                 categorizer = AutoCategorizer(mongo)
                 categorizer.learn_from_categorization(description, new_category_id)
@@ -322,7 +328,10 @@ def edit_transaction(transaction_id):
 def delete_transaction(transaction_id):
     """Delete a transaction by its MongoDB ObjectId string."""
     try:
-        mongo.db.transactions.delete_one({'_id': ObjectId(transaction_id)})
+        if deleted := mongo.db.transactions.find_one_and_delete(
+            {'_id': ObjectId(transaction_id)}, projection={'date': 1}
+        ):
+            Aggregations.invalidate_monthly_summaries(mongo, [deleted.get('date')])
         flash('Transaction deleted.', 'success')
     except (ValueError, KeyError) as e:  # pylint: disable=broad-exception-caught
         flash(f'Error: {e}', 'danger')
@@ -351,38 +360,26 @@ def _handle_upload_post(file) -> object:
         if not selected_account:
             flash('Selected account not found.', 'danger')
             return redirect(url_for('web.upload'))
-        content = file.read().decode('utf-8')
+        content = open_upload(file)
         filename = secure_filename(file.filename)
         validation = CSVParser.validate_csv(content)
         if not validation['valid']:
             flash(f'Invalid CSV: {validation["error"]}', 'danger')
             return redirect(url_for('web.upload'))
-        parse_result = CSVParser.parse_csv(content, filename)
-        if not parse_result['row_count']:
-            flash('No valid transactions found.', 'warning')
-            return redirect(url_for('web.upload'))
-        categorized, uncategorized = process_transactions(
-            parse_result,
+        upload = process_transactions(
+            CSVParser.parse_csv_iter(content, current_app.config['UPLOAD_BATCH_SIZE']),
             filename,
-            AutoCategorizer(mongo),
+            get_categorizer(mongo),
             account_id=selected_account_id,
             account_type=selected_account['type'],
-        )[1:]
-        month = (parse_result['transactions'][0]['date'].strftime('%Y-%m') if parse_result['transactions'] else '')
-        mongo.db.uploads.insert_one({
-            'filename': filename,
-            'upload_date': datetime.now(UTC),
-            'row_count': parse_result['row_count'],
-            'month': month,
-            'status': 'processed',
-            'categorized_count': categorized,
-            'uncategorized_count': uncategorized,
-            'errors': parse_result['errors'],
-            'account_id': selected_account_id,
-        })
+        )
+        if upload is None:
+            flash('No valid transactions found.', 'warning')
+            return redirect(url_for('web.upload'))
         flash(
-            f'Imported {parse_result["row_count"]} transactions '
-            f'({categorized} auto-categorized, {uncategorized} uncategorized).',
+            f'Imported {upload["row_count"]} transactions '
+            f'({upload["categorized_count"]} auto-categorized, '
+            f'{upload["uncategorized_count"]} uncategorized).',
             'success'
         )
     except Exception as e:  # pylint: disable=broad-exception-caught
@@ -502,9 +499,6 @@ def add_category():
     """Create a new category from the modal form."""
     try:
         name = request.form['name'].strip()
-        if mongo.db.categories.find_one({'name': name}):
-            flash(f'Category "{name}" already exists.', 'danger')
-            return redirect(url_for('web.categories'))
         category = Category.create(
             category_id=Category.get_next_id(mongo),
             name=name,
@@ -513,7 +507,11 @@ def add_category():
             monthly_limit=float(request.form.get('monthly_limit') or 0),
         )
         mongo.db.categories.insert_one(category)
+        category_cache.clear()
         flash(f'Category "{name}" created.', 'success')
+    except DuplicateKeyError:
+        # Duplicate names are rejected by the unique index on insert
+        flash(f'Category "{request.form["name"].strip()}" already exists.', 'danger')
     except (ValueError, KeyError) as e:  # pylint: disable=broad-exception-caught
         flash(f'Error: {e}', 'danger')
     return redirect(url_for('web.categories'))
@@ -548,7 +546,10 @@ def edit_category(category_id):
                     }
                 }
             )
+        category_cache.clear()
         flash('Category updated.', 'success')
+    except DuplicateKeyError:
+        flash(f'Category "{request.form["name"].strip()}" already exists.', 'danger')
     except (ValueError, KeyError) as e:  # pylint: disable=broad-exception-caught
         flash(f'Error: {e}', 'danger')
     return redirect(url_for('web.categories'))
@@ -570,5 +571,6 @@ def delete_category(category_id):
         flash(f'Cannot delete "{category["name"]}" - used by {count} transaction(s).', 'danger')
         return redirect(url_for('web.categories'))
     mongo.db.categories.delete_one({'id': category_id})
+    category_cache.clear()
     flash(f'Category "{category["name"]}" deleted.', 'success')
     return redirect(url_for('web.categories'))